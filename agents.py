@@ -0,0 +1,222 @@
+# pacman/agents.py
+"""Agents that drive Pac-Man through Simulation(agent=...).
+
+An agent's act(sim) returns the action (one of the codes in constants) for
+the tick about to be played. Without an agent, the simulation uses its
+built-in find_target() + planner pipeline.
+
+LookaheadAgent runs Monte Carlo tree search over Pac-Man's actions, with
+Simulation.snapshot()/restore() as its forward model. Each iteration plays
+a branch of the tree from the current state, with fresh ghost dice every
+time, then a short random rollout, and scores the branch by the points
+it gained less a penalty for dying. Iterations are only started while the
+mean iteration still fits in budget_ms, and one that runs into the deadline
+stops stepping there, keeping time to put the game back, and the
+agent plays the most-visited action expanded so far, or leaves the move to
+the built-in agent when the budget allowed none. With workers, every worker
+process searches the same state for the budget less the measured dispatch
+overhead and the visit counts are summed (root parallelisation).
+"""
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from time import perf_counter
+from .constants import UP, DOWN, LEFT, RIGHT, STAY, WARP_LEFT, WARP_RIGHT
+from .events import log
+from .game_logic import action_target
+from .simulation import Simulation
+
+ACTIONS = (UP, DOWN, LEFT, RIGHT, STAY, WARP_LEFT, WARP_RIGHT)
+REVERSE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+class Agent:
+    """Chooses Pac-Man's action each tick."""
+
+    def act(self, sim):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def legal_actions(sim, actions=ACTIONS):
+    """The actions that move Pac-Man from where he is now."""
+    pos, maze, warp_rows = sim.pacman_pos, sim.maze, sim.layout.warp_rows
+    return [action for action in actions if action_target(pos, action, maze, warp_rows) is not None]
+
+@contextmanager
+def searching(sim, rng):
+    """Let a search step sim freely: no observers, events, profiling or log
+    messages, ghost dice from rng, and the game state put back afterwards."""
+    saved = sim.observers, sim.events, sim.profiler, sim.rng, log.disabled
+    sim.observers, sim.events, sim.profiler, sim.rng = [], None, None, rng
+    log.disabled = True
+    root = sim.snapshot(rng=False)
+    try:
+        yield root
+    finally:
+        sim.restore(root)
+        sim.observers, sim.events, sim.profiler, sim.rng, log.disabled = saved
+
+class _Node:
+    __slots__ = ("visits", "value", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0
+        self.children = {}
+
+class LookaheadAgent(Agent):
+    """Monte Carlo tree search within budget_ms per move.
+
+    horizon is the number of ticks an iteration looks ahead, tree and
+    rollout together; exploration is the UCB constant, applied to returns
+    divided by scale; dying costs death_penalty points.
+    """
+
+    def __init__(self, budget_ms=50, horizon=20, exploration=1.4, death_penalty=1000, scale=200, workers=0, seed=None):
+        self.budget_ms = budget_ms
+        self.horizon = horizon
+        self.exploration = exploration
+        self.death_penalty = death_penalty
+        self.scale = scale
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self._pool = None
+        self._overhead = 0.0
+
+    def act(self, sim):
+        """The most-visited root action of a search within budget_ms, or None
+        for the built-in agent's move when no action was expanded in time."""
+        if self.workers and self._pool is None:
+            self._start_pool()
+        start = perf_counter()
+        deadline = start + self.budget_ms / 1000
+        if self.workers:
+            stats, iterations = self._search_parallel(sim, deadline)
+        else:
+            stats, iterations = self.search(sim, deadline)
+        action = max(stats, key=lambda a: stats[a]) if stats else None
+        profiler = sim.profiler
+        if profiler is not None:
+            profiler.count("iterations", iterations)
+            profiler.count("budget_used", (perf_counter() - start) * 1000 / self.budget_ms)
+        return action
+
+    def search(self, sim, deadline):
+        """({action: (visits, total return)} at the root, iterations) of a search until deadline.
+
+        Every tick stepped counts against deadline, less the time to restore
+        the game once more on the way out: an iteration that gets there
+        stops stepping and is scored as far as it got. After the first, a
+        new one is only started when the mean iteration still fits, so a
+        short budget may expand only some root actions, or none.
+        """
+        tree = _Node()
+        iterations, spent = 0, 0.0
+        with searching(sim, self.rng) as root:
+            start = perf_counter()
+            while True:
+                sim.restore(root)
+                now = perf_counter()
+                stop = deadline - (now - start)
+                if now >= stop or (iterations and now + spent / iterations >= stop):
+                    break
+                self._iterate(sim, tree, stop)
+                iterations += 1
+                start = perf_counter()
+                spent += start - now
+        return {action: (node.visits, node.value) for action, node in tree.children.items()}, iterations
+
+    def _iterate(self, sim, tree, stop):
+        rng, start_score = self.rng, sim.score
+        node, path, depth = tree, [tree], 0
+        while not sim.done and depth < self.horizon and perf_counter() < stop:
+            actions = legal_actions(sim)
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                action = rng.choice(untried)
+                node.children[action] = _Node()
+                node = node.children[action]
+            else:
+                log_visits = math.log(node.visits)
+                children = node.children
+                action = max(actions, key=lambda a: children[a].value / (children[a].visits * self.scale)
+                             + self.exploration * math.sqrt(log_visits / children[a].visits))
+                node = children[action]
+            sim.step(action)
+            depth += 1
+            path.append(node)
+            if untried:
+                break
+        self._rollout(sim, depth, stop)
+        value = sim.score - start_score - (self.death_penalty if sim.state == "game_over" else 0)
+        for node in path:
+            node.visits += 1
+            node.value += value
+
+    def _rollout(self, sim, depth, stop):
+        """Wander on until the horizon or stop, turning at random but never straight back."""
+        rng, last = self.rng, sim.action
+        while not sim.done and depth < self.horizon and perf_counter() < stop:
+            moves = [action for action in legal_actions(sim, (UP, DOWN, LEFT, RIGHT)) if action != REVERSE.get(last)]
+            last = rng.choice(moves) if moves else REVERSE.get(last, STAY)
+            sim.step(last)
+            depth += 1
+
+    def _start_pool(self):
+        # Start every worker process up front, so that spawning them is not
+        # charged to a move's budget or to the dispatch overhead estimate
+        self._pool = ProcessPoolExecutor(self.workers)
+        list(self._pool.map(_ready, range(self.workers)))
+
+    def _search_parallel(self, sim, deadline):
+        # Workers get what is left of the budget less the dispatch and IPC
+        # time that the earlier moves took on top of theirs
+        dispatched = perf_counter()
+        snapshot = sim.snapshot(rng=False)
+        budget = max(0.0, deadline - dispatched - self._overhead)
+        settings = {"horizon": self.horizon, "exploration": self.exploration, "death_penalty": self.death_penalty, "scale": self.scale}
+        jobs = [self._pool.submit(_search_worker, snapshot, budget, self.rng.getrandbits(32), settings, sim.config)
+                for _ in range(self.workers)]
+        stats, iterations = {}, 0
+        for job in jobs:
+            worker_stats, worker_iterations = job.result()
+            iterations += worker_iterations
+            for action, (visits, value) in worker_stats.items():
+                total_visits, total_value = stats.get(action, (0, 0.0))
+                stats[action] = (total_visits + visits, total_value + value)
+        overhead = max(0.0, perf_counter() - dispatched - budget)
+        # Jump up to a slower dispatch at once, and only ease back down
+        self._overhead = max(overhead, 0.8 * self._overhead + 0.2 * overhead)
+        return stats, iterations
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+_worker_sims = {}
+
+def _ready(_):
+    return True
+
+def _search_worker(snapshot, budget, seed, settings, config):
+    deadline = perf_counter() + budget  # setting up the simulation counts too
+    # A one-level simulation of the snapshot's layout, kept for the next move
+    # on the same maze; clearing it ends the game as a win
+    layout = snapshot.layout
+    key = (layout.grid.tobytes(), layout.warp_rows, layout.respawn, config)
+    sim = _worker_sims.get(key)
+    if sim is None:
+        sim = _worker_sims[key] = Simulation(mazes=[layout], config=config)
+    snapshot.layout = sim.layout  # the same maze, so restore() keeps its planner
+    sim.restore(snapshot)
+    agent = LookaheadAgent(seed=seed, **settings)
+    return agent.search(sim, deadline)
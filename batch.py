@@ -0,0 +1,135 @@
+# pacman/batch.py
+"""Run many seeded headless episodes across worker processes.
+
+    python -m pacman.batch --seeds 0:1000 --workers 8 --output results.jsonl
+
+Every episode gets its own random.Random(seed), so a seed always produces
+the same result no matter how many workers run or which one picks it up.
+Results are written in seed order as soon as they are available. With
+--events DIR each episode also records its game events to DIR/seed-N.jsonl
+(or .bin with --events-format bin), and with --replays DIR a replay to
+DIR/seed-N.pmr (see replay.py). --mazes FILE plays the levels of a maze file
+(see layouts.py) instead of the built-in ones. --budget-ms MS has Pac-Man
+played by a LookaheadAgent searching MS milliseconds per move (see agents.py)
+instead of the built-in A* agent; those results depend on machine speed.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from .agents import LookaheadAgent
+from .config import DEFAULT_CONFIG
+from .events import open_event_sink
+from .layouts import LEVELS, load_mazes
+from .replay import ReplayRecorder
+from .simulation import Simulation, run_episode, episode_result
+
+FIELDS = ["seed", "state", "score", "level", "ticks", "cause"]
+
+def parse_seeds(text):
+    """Parse "N" (seeds 0..N-1) or "START:STOP" (seeds START..STOP-1)."""
+    if ":" in text:
+        start, stop = text.split(":", 1)
+        return range(int(start), int(stop))
+    return range(int(text))
+
+_maze_files = {}
+
+def _mazes(path):
+    """The mazes in path, loaded once per worker; the built-in levels for None."""
+    if path is None:
+        return LEVELS
+    if path not in _maze_files:
+        _maze_files[path] = load_mazes(path)
+    return _maze_files[path]
+
+def play_seed(seed, max_ticks=None, events_path=None, mazes_path=None, replay_path=None, budget_ms=None, config=DEFAULT_CONFIG):
+    mazes = _mazes(mazes_path)
+    agent = None if budget_ms is None else LookaheadAgent(budget_ms, seed=seed)
+    if events_path is None and replay_path is None:
+        return episode_result(run_episode(max_ticks=max_ticks, seed=seed, mazes=mazes, agent=agent, config=config))
+    events = None if events_path is None else open_event_sink(events_path)
+    try:
+        sim = Simulation(seed=seed, events=events, mazes=mazes, agent=agent, config=config)
+        recorder = None if replay_path is None else ReplayRecorder(sim)
+        if sim.run(max_ticks) == "playing":
+            sim.cause = "timeout"
+    finally:
+        if events is not None:
+            events.close()
+    if recorder is not None:
+        recorder.save(replay_path)
+    return episode_result(sim)
+
+def _play_seed(args):
+    return play_seed(*args)
+
+def _init_worker(log_level):
+    logging.basicConfig(level=log_level, stream=sys.stderr, format="%(processName)s %(message)s")
+
+def run_batch(seeds, workers=None, max_ticks=None, verbose=False, events_dir=None, events_format="jsonl", mazes_path=None,
+              replays_dir=None, budget_ms=None):
+    """Yield one result dict per seed, in seed order."""
+    for directory in (events_dir, replays_dir):
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+    jobs = [(seed, max_ticks,
+             None if events_dir is None else os.path.join(events_dir, f"seed-{seed}.{events_format}"),
+             mazes_path,
+             None if replays_dir is None else os.path.join(replays_dir, f"seed-{seed}.pmr"),
+             budget_ms)
+            for seed in seeds]
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 8))
+    log_level = logging.DEBUG if verbose else logging.WARNING
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_level,)) as pool:
+        yield from pool.map(_play_seed, jobs, chunksize=chunksize)
+
+class ResultWriter:
+    """Streams result dicts to a JSONL or CSV file."""
+
+    def __init__(self, stream, fmt="jsonl"):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == "csv":
+            self.csv = csv.DictWriter(stream, fieldnames=FIELDS)
+            self.csv.writeheader()
+
+    def write(self, result):
+        if self.fmt == "csv":
+            self.csv.writerow(result)
+        else:
+            self.stream.write(json.dumps(result) + "\n")
+        self.stream.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded headless Pac-Man episodes in parallel.")
+    parser.add_argument("--seeds", default="100", help='"N" for seeds 0..N-1 or "START:STOP"')
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="stop an episode after this many ticks")
+    parser.add_argument("--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="default: from the output extension")
+    parser.add_argument("--verbose", action="store_true", help="log the game's debug messages to stderr")
+    parser.add_argument("--events", default=None, metavar="DIR", help="record each episode's game events under DIR")
+    parser.add_argument("--events-format", choices=["jsonl", "bin"], default="jsonl", help="event file format")
+    parser.add_argument("--replays", default=None, metavar="DIR", help="record a replay of each episode under DIR")
+    parser.add_argument("--mazes", default=None, metavar="FILE", help="play the levels of this maze file (text or .pmz)")
+    parser.add_argument("--budget-ms", type=float, default=None, metavar="MS",
+                        help="play Pac-Man by tree search with MS milliseconds per move")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        writer = ResultWriter(stream, fmt)
+        for result in run_batch(parse_seeds(args.seeds), args.workers, args.max_ticks, args.verbose, args.events, args.events_format,
+                                args.mazes, args.replays, args.budget_ms):
+            writer.write(result)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# pacman/bench.py
+"""Benchmarks for the planner, the game logic and the headless simulation.
+
+    python -m pacman.bench --output bench.json
+    python -m pacman.bench --baseline bench.json
+
+Every case runs on both levels in MAZES and on a synthetic large maze with
+many ghosts, timing one operation at a time. Each case is repeated
+--repeats times on the same seeds and reports the median over the repeats
+of ops/s and p50/p99 latency, each repeat's ops/s and p50, and the peak
+traced memory of a cold run. Results are written as JSON. With --baseline,
+a case regresses when its best repeat's throughput or p50 latency is worse
+than the baseline's best by more than --tolerance plus the spread between
+the repeats of the noisier run, so run-to-run noise is not reported; on
+any regression the exit status is 1.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from .constants import MAZES, GHOST_SPAWN, RED, PINK, ORANGE, BLUE
+from .game_logic import a_star, find_target, move_ghost
+from .ghosts import GhostSet
+from .simulation import Simulation
+
+def synthetic_maze(rows, cols):
+    """A rows x cols maze of 2x2 wall blocks on a 4-cell grid, full of pellets."""
+    maze = [[1 if r in (0, rows - 1) or c in (0, cols - 1) or (r % 4 >= 2 and c % 4 >= 2) else 2
+             for c in range(cols)] for r in range(rows)]
+    spawn_r, spawn_c = GHOST_SPAWN
+    for r, c in [(1, 1), (spawn_r, spawn_c), (spawn_r, spawn_c + 1), (spawn_r + 1, spawn_c), (spawn_r + 1, spawn_c + 1)]:
+        maze[r][c] = 0
+    for r, c in [(1, cols - 2), (rows - 2, 1), (1, cols // 2), (rows // 2, 1)]:
+        maze[r][c] = 3
+    return maze
+
+class Workload:
+    """A maze to benchmark on, and how to start a game on it."""
+
+    def __init__(self, name, mazes, level=0, ghost_count=None, scale=1.0, max_ticks=3000):
+        self.name = name
+        self.mazes = mazes
+        self.level = level
+        self.ghost_count = ghost_count
+        self.scale = scale
+        self.max_ticks = max_ticks
+
+    def simulation(self, seed=0):
+        sim = Simulation(self.level, seed=seed, mazes=self.mazes)
+        if self.ghost_count is not None:
+            # Spread the ghosts over the maze, away from Pac-Man's start
+            rng = random.Random(seed)
+            cells = [(r, c) for r, row in enumerate(sim.maze) for c, cell in enumerate(row) if cell != 1 and r + c > 12]
+            colors = [RED, PINK, ORANGE, BLUE]
+            sim.ghosts = GhostSet(rng.sample(cells, self.ghost_count),
+                                  [colors[i % 4] for i in range(self.ghost_count)], [0] * self.ghost_count)
+        return sim
+
+def workloads(size=200, ghosts=64):
+    levels = [Workload(f"level{i + 1}", MAZES, level=i) for i in range(len(MAZES))]
+    return levels + [Workload(f"large{size}", [synthetic_maze(size, size)], ghost_count=ghosts, scale=0.05, max_ticks=50)]
+
+def _playing(workload, seed):
+    """Simulations of workload, a fresh one (next seed) whenever a game ends."""
+    while True:
+        sim = workload.simulation(seed)
+        while not sim.done:
+            yield sim
+        seed += 1
+
+def bench_a_star(workload, n, seed=0):
+    sim = workload.simulation(seed)
+    sim.run(50)
+    sim.danger.update(sim.ghosts)
+    rng = random.Random(seed)
+    cells = [(r, c) for r, row in enumerate(sim.maze) for c, cell in enumerate(row) if cell != 1]
+    timings = []
+    for _ in range(n):
+        start, goal = rng.sample(cells, 2)
+        t = time.perf_counter_ns()
+        a_star(start, goal, sim.maze, sim.ghosts, False, sim.danger)
+        timings.append(time.perf_counter_ns() - t)
+    return timings
+
+def bench_find_target(workload, n, seed=0):
+    timings = []
+    for sim in _playing(workload, seed):
+        if len(timings) >= n:
+            break
+        sim.danger.update(sim.ghosts)
+        t = time.perf_counter_ns()
+        find_target(sim.pacman_pos, sim.maze, sim.ghosts, sim.power_mode, sim.power_timer, sim.distances, sim.pellets, sim.danger,
+                    pacman_map=sim.pacman_map)
+        timings.append(time.perf_counter_ns() - t)
+        sim.step()
+    return timings
+
+def bench_move_ghost(workload, n, seed=0):
+    sim = workload.simulation(seed)
+    ghosts, rng = sim.ghosts, random.Random(seed)
+    sim.pacman_map.update(sim.pacman_pos)
+    timings = []
+    while len(timings) < n:
+        for i in range(len(ghosts)):
+            t = time.perf_counter_ns()
+            move_ghost(ghosts, i, sim.maze, sim.pacman_pos, False, rng, pacman_map=sim.pacman_map)
+            timings.append(time.perf_counter_ns() - t)
+    return timings[:n]
+
+def bench_reachable_pellets(workload, n, seed=0):
+    timings = []
+    for sim in _playing(workload, seed):
+        if len(timings) >= n:
+            break
+        t = time.perf_counter_ns()
+        sim.reachable_pellets()
+        timings.append(time.perf_counter_ns() - t)
+        sim.step()
+    return timings
+
+def bench_tick(workload, n, seed=0):
+    timings = []
+    for sim in _playing(workload, seed):
+        if len(timings) >= n:
+            break
+        t = time.perf_counter_ns()
+        sim.step()
+        timings.append(time.perf_counter_ns() - t)
+    return timings
+
+def bench_episode(workload, n, seed=0):
+    timings = []
+    for episode in range(n):
+        sim = workload.simulation(seed + episode)
+        t = time.perf_counter_ns()
+        sim.run(workload.max_ticks)
+        timings.append(time.perf_counter_ns() - t)
+    return timings
+
+# name -> (function, operations per run at scale 1)
+CASES = {
+    "a_star": (bench_a_star, 300),
+    "find_target": (bench_find_target, 1000),
+    "move_ghost": (bench_move_ghost, 20000),
+    "reachable_pellets": (bench_reachable_pellets, 1000),
+    "tick": (bench_tick, 2000),
+    "episode": (bench_episode, 3),
+}
+
+def summarize(runs, peak):
+    """The medians over the repeats of a case (each a list of timings in ns), and each repeat's ops/s and p50."""
+    runs = [np.array(timings) / 1000 for timings in runs]
+    ops_per_s = [round(len(timings) / (timings.sum() / 1e6), 2) for timings in runs]
+    p50 = [round(float(np.percentile(timings, 50)), 2) for timings in runs]
+    return {
+        "ops": len(runs[0]),
+        "repeats": len(runs),
+        "ops_per_s": round(float(np.median(ops_per_s)), 2),
+        "p50_us": round(float(np.median(p50)), 2),
+        "p99_us": round(float(np.median([np.percentile(timings, 99) for timings in runs])), 2),
+        "peak_kib": round(peak / 1024, 1),
+        "ops_per_s_runs": ops_per_s,
+        "p50_us_runs": p50,
+    }
+
+def run_benchmarks(only=None, quick=False, size=200, ghosts=64, seed=0, report=None, repeats=5):
+    """Run every case on every workload, repeats times; returns {"case/workload": summary}.
+
+    The repeats go round all the cases in turn, so a burst of other work on
+    the machine slows one repeat of several cases rather than every repeat
+    of one. Cases are reported as their last repeat finishes.
+    """
+    cases = []
+    for workload in workloads(size, ghosts):
+        for case, (bench, ops) in CASES.items():
+            name = f"{case}/{workload.name}"
+            if only and only not in name:
+                continue
+            n = max(1, int(ops * workload.scale * (0.1 if quick else 1)))
+            # Peak memory comes from a short cold run, before caches are warm
+            tracemalloc.start()
+            bench(workload, max(1, n // 10), seed)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            cases.append((name, bench, workload, n, peak))
+    runs = {name: [] for name, *_ in cases}
+    results = {}
+    for repeat in range(repeats):
+        for name, bench, workload, n, peak in cases:
+            runs[name].append(bench(workload, n, seed))
+            if repeat == repeats - 1:
+                results[name] = summarize(runs[name], peak)
+                if report:
+                    report(name, results[name])
+    return results
+
+def _spread(values):
+    """How far apart repeats are, relative to the smallest."""
+    return (max(values) - min(values)) / min(values) if min(values) > 0 else 0.0
+
+def compare(results, baseline, tolerance=0.2):
+    """Regressions against baseline results, as readable strings.
+
+    The best repeats are compared, as the ones least disturbed by other
+    work on the machine. A case regresses when its best is worse than the
+    baseline's best by more than tolerance plus the spread between the
+    repeats of whichever run was noisier. Results without per-repeat values
+    count as a single repeat.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        new = results.get(name)
+        if new is None:
+            continue
+        new_ops, base_ops = new.get("ops_per_s_runs", [new["ops_per_s"]]), base.get("ops_per_s_runs", [base["ops_per_s"]])
+        allowed = tolerance + max(_spread(new_ops), _spread(base_ops))
+        if max(new_ops) * (1 + allowed) < max(base_ops):
+            regressions.append(f"{name}: best {max(new_ops):.1f} ops/s, baseline best {max(base_ops):.1f} "
+                               f"(allowed {allowed:.0%} slower)")
+        new_p50, base_p50 = new.get("p50_us_runs", [new["p50_us"]]), base.get("p50_us_runs", [base["p50_us"]])
+        allowed = tolerance + max(_spread(new_p50), _spread(base_p50))
+        if min(new_p50) > min(base_p50) * (1 + allowed):
+            regressions.append(f"{name}: best p50 {min(new_p50):.1f} us, baseline best {min(base_p50):.1f} "
+                               f"(allowed {allowed:.0%} slower)")
+    return regressions
+
+def _report(name, result):
+    ops = result["ops_per_s_runs"]
+    spread = (max(ops) - min(ops)) / result["ops_per_s"]
+    print(f"{name:<24} {result['ops_per_s']:>12.1f} ops/s  spread {spread:>4.0%}  p50 {result['p50_us']:>10.1f} us  "
+          f"p99 {result['p99_us']:>10.1f} us  peak {result['peak_kib']:>9.1f} KiB", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Pac-Man planner, game logic and simulation.")
+    parser.add_argument("--only", default=None, help='run only cases whose name contains this, e.g. "a_star" or "level1"')
+    parser.add_argument("--quick", action="store_true", help="a tenth of the operations, for a fast check")
+    parser.add_argument("--size", type=int, default=200, help="rows and columns of the synthetic maze")
+    parser.add_argument("--ghosts", type=int, default=64, help="ghosts in the synthetic maze")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5, help="times to run each case; medians and spread come from these")
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before a case regresses")
+    args = parser.parse_args(argv)
+
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+    results = run_benchmarks(args.only, args.quick, args.size, args.ghosts, args.seed, report=_report, repeats=args.repeats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# pacman/bitboards.py
+"""Mazes and sets of cells as bitboards.
+
+A bitboard is a Python int with one bit per cell: bit r * (cols + 1) + c
+is the cell (r, c). The extra column in every row is never set, so a
+whole board steps one cell left or right with a shift without wrapping
+into the next row. Python ints are arbitrary precision, so one board
+holds a maze of any size and &, |, ~ and bit_count() work on all of its
+cells at once.
+
+BitMaze keeps the open (non-wall) cells of a maze and its warp tunnels,
+and answers set-wise questions with a handful of shifts per step:
+
+    bits = bit_maze(sim.maze, sim.layout.warp_rows)
+    ghosts = bits.board(sim.ghosts.active_positions())
+    safe = bits.reachable(sim.pacman_pos, blocked=ghosts)
+    count(safe & sim.pellets.bits)   # pellets Pac-Man can reach without passing a ghost
+
+to_array() and from_array() convert to and from NumPy bool grids, by way
+of np.packbits, for code that works on arrays.
+"""
+import numpy as np
+from .constants import WARP_ROWS
+from .distances import warp_sources
+
+def count(board):
+    """The number of cells on a board."""
+    return board.bit_count()
+
+class BitMaze:
+    """The open cells and warp tunnels of a maze, as bitboards.
+
+    The tunnels are the warps of the distance table (see warp_sources()):
+    each is the board of cells that warp to a tunnel end, and that end.
+    walkable is the open cells plus the tunnel ends, which Pac-Man can
+    stand on even where they are walls.
+    """
+
+    def __init__(self, maze, warp_rows=WARP_ROWS):
+        self.rows = len(maze)
+        self.cols = len(maze[0])
+        self.stride = self.cols + 1
+        self.open = self.board((r, c) for r, row in enumerate(maze) for c, cell in enumerate(row) if cell != 1)
+        self.tunnels = [(self.board(sources), self.bit(end)) for end, sources in warp_sources(maze, warp_rows).items() if sources]
+        self.walkable = self.open
+        for _, end in self.tunnels:
+            self.walkable |= end
+
+    def bit(self, pos):
+        """The board holding just pos."""
+        return 1 << (pos[0] * self.stride + pos[1])
+
+    def board(self, cells):
+        """The board holding cells."""
+        board = 0
+        for r, c in cells:
+            board |= 1 << (r * self.stride + c)
+        return board
+
+    def cells(self, board):
+        """The cells on a board, in row-major order."""
+        cells = []
+        while board:
+            low = board & -board
+            i = low.bit_length() - 1
+            cells.append(divmod(i, self.stride))
+            board ^= low
+        return cells
+
+    def is_open(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols and bool(self.open >> (pos[0] * self.stride + pos[1]) & 1)
+
+    def neighbors(self, board):
+        """The cells one step (or one warp) from any cell on board."""
+        stride = self.stride
+        result = (board << 1 | board >> 1 | board << stride | board >> stride) & self.open
+        for sources, end in self.tunnels:
+            if board & sources:
+                result |= end
+        return result
+
+    def moves(self, pos):
+        """The cells Pac-Man can move to from pos."""
+        return self.neighbors(self.bit(pos))
+
+    def reachable(self, start, blocked=0):
+        """The walkable cells reachable from start without entering a blocked one.
+
+        start is a cell or a board; blocked start cells are left out.
+        """
+        allowed = self.walkable & ~blocked
+        seen = frontier = (self.bit(start) if isinstance(start, (tuple, list)) else start) & allowed
+        while frontier:
+            frontier = self.neighbors(frontier) & allowed & ~seen
+            seen |= frontier
+        return seen
+
+    def within(self, start, steps, blocked=0):
+        """The walkable cells at most steps moves from start, avoiding blocked ones."""
+        allowed = self.walkable & ~blocked
+        seen = frontier = (self.bit(start) if isinstance(start, (tuple, list)) else start) & allowed
+        for _ in range(steps):
+            frontier = self.neighbors(frontier) & allowed & ~seen
+            if not frontier:
+                break
+            seen |= frontier
+        return seen
+
+    def to_array(self, board):
+        """A rows x cols bool array of the cells on board."""
+        size = self.rows * self.stride
+        data = np.frombuffer(board.to_bytes(-(-size // 8), "little"), dtype=np.uint8)
+        bits = np.unpackbits(data, count=size, bitorder="little")
+        return bits.reshape(self.rows, self.stride)[:, :self.cols].astype(bool)
+
+    def from_array(self, cells):
+        """The board of the true cells of a rows x cols array."""
+        padded = np.zeros((self.rows, self.stride), dtype=bool)
+        padded[:, :self.cols] = cells
+        return int.from_bytes(np.packbits(padded, bitorder="little").tobytes(), "little")
+
+_mazes = {}
+
+def bit_maze(maze, warp_rows=WARP_ROWS):
+    """Return the BitMaze for this maze's walls and warp rows, building it on first use."""
+    key = (len(maze[0]), tuple(warp_rows), bytes(cell == 1 for row in maze for cell in row))
+    bits = _mazes.get(key)
+    if bits is None:
+        bits = _mazes[key] = BitMaze(maze, warp_rows)
+    return bits
@@ -0,0 +1,59 @@
+# pacman/config.py
+"""The tunable constants of the game and its built-in agent, in one place.
+
+Simulation(config=GameConfig(safe_dist=3)) plays by other values; see
+sweep.py for searching over them.
+"""
+import hashlib
+import json
+from .constants import POWER_MODE_DELAY
+
+class GameConfig:
+    """Tuning constants, each with the value the game has always used.
+
+      safe_dist             -- clearance from ghosts is_path_safe() wants for a target
+      ghost_radius          -- planning penalises cells this close to a ghost...
+      ghost_penalty         -- ...by this much per ghost
+      ghost_random_rate     -- chance a chasing ghost steps in a random direction
+      ghost_move_ticks      -- ticks between a ghost's moves...
+      ghost_slow_move_ticks -- ...and after it went through a warp tunnel
+      power_mode_delay      -- ticks between Pac-Man's moves in power mode
+    """
+
+    FIELDS = ("safe_dist", "ghost_radius", "ghost_penalty", "ghost_random_rate", "ghost_move_ticks",
+              "ghost_slow_move_ticks", "power_mode_delay")
+
+    def __init__(self, safe_dist=4, ghost_radius=4, ghost_penalty=100, ghost_random_rate=0.25, ghost_move_ticks=1.65,
+                 ghost_slow_move_ticks=3.6, power_mode_delay=POWER_MODE_DELAY):
+        self.safe_dist = safe_dist
+        self.ghost_radius = ghost_radius
+        self.ghost_penalty = ghost_penalty
+        self.ghost_random_rate = ghost_random_rate
+        self.ghost_move_ticks = ghost_move_ticks
+        self.ghost_slow_move_ticks = ghost_slow_move_ticks
+        self.power_mode_delay = power_mode_delay
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def replace(self, **changes):
+        """A copy with some values changed."""
+        unknown = set(changes) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown config values: {', '.join(sorted(unknown))}")
+        return GameConfig(**{**self.as_dict(), **changes})
+
+    def key(self):
+        """A short hash of the values, stable across runs and machines."""
+        return hashlib.sha1(json.dumps(self.as_dict(), sort_keys=True).encode()).hexdigest()[:16]
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash(tuple(self.as_dict().items()))
+
+    def __repr__(self):
+        return "GameConfig(" + ", ".join(f"{name}={value!r}" for name, value in self.as_dict().items()) + ")"
+
+DEFAULT_CONFIG = GameConfig()
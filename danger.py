@@ -0,0 +1,101 @@
+# pacman/danger.py
+import numpy as np
+from .constants import WARP_ROWS
+from .distances import UNREACHABLE
+
+class DangerField:
+    """Ghost danger over the whole grid, rebuilt once per tick from the active ghosts.
+
+    After update():
+      nearest -- heuristic() distance from each cell to the closest active ghost
+      walk    -- walking distance to the closest active ghost (needs a DistanceTable,
+                 otherwise the same as nearest)
+      cost    -- path penalty for stepping onto each cell: every ghost within
+                 radius adds penalty, scaled by falloff ("step", "linear" or "inverse")
+    Each grid is a NumPy array, with a list-of-lists copy in nearest_rows,
+    walk_rows and cost_rows for cheap single-cell reads.
+    """
+
+    def __init__(self, rows, cols, radius=4, penalty=100, falloff="step", distances=None, warp_rows=WARP_ROWS):
+        if falloff not in ("step", "linear", "inverse"):
+            raise ValueError(f"Unknown danger falloff: {falloff}")
+        self.rows = rows
+        self.cols = cols
+        self.radius = radius
+        self.penalty = penalty
+        self.falloff = falloff
+        self.distances = distances
+        self.warp_rows = tuple(warp_rows)
+        self.cell_rows, self.cell_cols = np.indices((rows, cols))
+        if distances is not None:
+            index = np.frombuffer(distances.index, dtype=np.int32).reshape(rows, cols)
+            self._open = index >= 0
+            self._open_index = index[self._open]
+            self._walks = np.frombuffer(distances.table, dtype=np.uint16).reshape(distances.size, distances.size)
+        self._rebuild([])
+
+    def update(self, ghosts):
+        """Rebuild the grids for the ghosts that are currently on the board.
+
+        Ghosts only move every other tick or so, so the grids are kept as they
+        are when the active ghost positions have not changed.
+        """
+        active = ghosts.active_positions()
+        if active != self.ghosts:
+            self._rebuild(active)
+
+    def _rebuild(self, active):
+        self.ghosts = active
+        if not self.ghosts:
+            self.nearest = np.full((self.rows, self.cols), np.inf)
+            self.walk = self.nearest
+            self.cost = np.zeros((self.rows, self.cols))
+        else:
+            self._build()
+        # Identifies the penalty layout, e.g. for caching planned paths
+        self.signature = hash(self.cost.tobytes())
+        # Plain-list copies for the scalar lookups on the planning hot paths
+        self.nearest_rows = self.nearest.tolist()
+        self.walk_rows = self.nearest_rows if self.walk is self.nearest else self.walk.tolist()
+        self.cost_rows = self.cost.tolist()
+
+    def _build(self):
+        pos = np.array(self.ghosts)
+        ghost_rows = pos[:, 0, None, None]
+        ghost_cols = pos[:, 1, None, None]
+        manhattan = (np.abs(self.cell_rows - ghost_rows) + np.abs(self.cell_cols - ghost_cols)).astype(float)
+        dist = manhattan.copy()
+        for warp_row in self.warp_rows:
+            on_warp = pos[:, 0] == warp_row
+            if not on_warp.any():
+                continue
+            # Same shortcut as heuristic(): both ends on a warp row may go through the tunnel
+            cols = self.cell_cols[warp_row]
+            warp_cols = pos[on_warp, 1, None]
+            through = np.minimum(cols + (self.cols - 1 - warp_cols), (self.cols - 1 - cols) + warp_cols) + 1
+            dist[on_warp, warp_row] = np.minimum(dist[on_warp, warp_row], through)
+        self.nearest = dist.min(axis=0)
+        self.cost = self._falloff(dist).sum(axis=0)
+        if self.distances is None:
+            self.walk = self.nearest
+            return
+        # Walking distances come from the DistanceTable, from each cell to the
+        # ghost as maze_distance(cell, ghost) has them: warps only go one way,
+        # so that is the ghost's column. Like maze_distance(), a ghost or cell
+        # off the open grid falls back to Manhattan distance.
+        walk = manhattan
+        for g, (r, c) in enumerate(self.ghosts):
+            i = self.distances.index[r * self.cols + c]
+            if i >= 0:
+                to_ghost = self._walks[self._open_index, i].astype(float)
+                to_ghost[to_ghost == UNREACHABLE] = np.inf
+                walk[g][self._open] = to_ghost
+        self.walk = walk.min(axis=0)
+
+    def _falloff(self, dist):
+        inside = dist < self.radius
+        if self.falloff == "step":
+            return np.where(inside, self.penalty, 0.0)
+        if self.falloff == "linear":
+            return np.where(inside, self.penalty * (self.radius - dist) / self.radius, 0.0)
+        return np.where(inside, self.penalty / (1 + dist), 0.0)
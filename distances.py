@@ -0,0 +1,203 @@
+# pacman/distances.py
+from array import array
+from collections import deque
+import numpy as np
+from .constants import WARP_ROWS
+from .game_logic import warp_end
+
+UNREACHABLE = 0xFFFF
+MAX_TABLE_CELLS = 4096
+
+_tables = {}
+
+def warp_sources(maze, warp_rows=WARP_ROWS):
+    """{tunnel end: [cells that warp to it]}, for the warps the warp actions take.
+
+    Each warp row has a tunnel end in its first and last column, wall or
+    not. Pac-Man warps to an end from the cells near the other one,
+    tunnel ends included, through the first warp row in reach (see
+    warp_end()), and walks on from where he lands.
+    """
+    rows, cols = len(maze), len(maze[0])
+    ends = [(row, col) for row in warp_rows for col in (0, cols - 1)]
+    sources = {end: [] for end in ends}
+    for r in range(rows):
+        for c in range(cols):
+            if maze[r][c] == 1 and (r, c) not in ends:
+                continue
+            for col in (0, cols - 1):
+                end = warp_end((r, c), col, cols, warp_rows)
+                if end is not None and end != (r, c):
+                    sources[end].append((r, c))
+    return sources
+
+def open_cells(maze, warp_rows=WARP_ROWS):
+    """(index, cells): the cells Pac-Man can stand on -- the open ones and the
+    tunnel ends -- in row-major order, and each grid cell's position in that
+    list (-1 for the others), indexed by r * cols + c."""
+    cols = len(maze[0])
+    ends = {(row, col) for row in warp_rows for col in (0, cols - 1)}
+    index = array("i", [-1]) * (len(maze) * cols)
+    cells = []
+    for r, row in enumerate(maze):
+        for c, cell in enumerate(row):
+            if cell != 1 or (r, c) in ends:
+                index[r * cols + c] = len(cells)
+                cells.append((r, c))
+    return index, cells
+
+def neighbor_lists(maze, index, cells, warp_rows=WARP_ROWS):
+    """(neighbors, has_warp): the cells each of cells moves to, by position
+    in cells -- its open neighbours, then the tunnel ends it warps to (see
+    warp_sources()) -- and whether there are any warps at all."""
+    rows, cols = len(maze), len(maze[0])
+    neighbors = []
+    for r, c in cells:
+        adjacent = []
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and maze[nr][nc] != 1:
+                adjacent.append(index[nr * cols + nc])
+        neighbors.append(adjacent)
+    has_warp = False
+    for (row, col), sources in warp_sources(maze, warp_rows).items():
+        for r, c in sources:
+            neighbors[index[r * cols + c]].append(index[row * cols + col])
+            has_warp = True
+    return neighbors, has_warp
+
+class DistanceTable:
+    """True walking distances between every pair of open cells in a maze.
+
+    Distances follow the maze walls and the warps a_star() takes on
+    warp_rows (see warp_sources()), so the tunnel ends count as cells even
+    where they are walls, and a warp is one move. They are stored in one
+    flat unsigned-short array so maze_distance() is a pair of index lookups.
+    """
+
+    def __init__(self, maze, warp_rows=WARP_ROWS):
+        self.rows = len(maze)
+        self.cols = len(maze[0])
+        self.index, self.cells = open_cells(maze, warp_rows)
+        self.size = len(self.cells)
+        self.table = array("H", [UNREACHABLE]) * (self.size * self.size)
+        neighbors, self.has_warp = neighbor_lists(maze, self.index, self.cells, warp_rows)
+        for source in range(self.size):
+            self._bfs(source, neighbors)
+
+    def _bfs(self, source, neighbors):
+        table, offset = self.table, source * self.size
+        table[offset + source] = 0
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            dist = table[offset + current] + 1
+            for neighbor in neighbors[current]:
+                if table[offset + neighbor] == UNREACHABLE:
+                    table[offset + neighbor] = dist
+                    queue.append(neighbor)
+
+    def maze_distance(self, a, b):
+        """Shortest walking distance from a to b, in moves.
+
+        Falls back to the Manhattan heuristic when either end is not an open
+        cell (e.g. a ghost still inside its spawn walls), and returns inf when
+        b cannot be reached from a.
+        """
+        i = self.index[a[0] * self.cols + a[1]]
+        j = self.index[b[0] * self.cols + b[1]]
+        if i < 0 or j < 0:
+            return abs(a[0] - b[0]) + abs(a[1] - b[1])
+        dist = self.table[i * self.size + j]
+        return float("inf") if dist == UNREACHABLE else dist
+
+class DistanceMap:
+    """Walking distance from one cell, the origin, to every cell of a maze.
+
+    update(origin) rebuilds grid, a list of rows, when the origin has moved:
+    from the origin's row of distances when there is one, otherwise with a
+    single BFS. grid[r][c] is maze_distance(origin, (r, c)): inf for open
+    cells that cannot be reached and Manhattan distance for walls. The
+    simulation keeps one rooted at Pac-Man, so the ghosts and find_target()
+    share one pass per Pac-Man move.
+
+    Grids are kept for the origins seen before, up to CACHE_CELLS cells in
+    all, since Pac-Man (and a search looking ahead from him) keeps coming
+    back to the same cells; callers must not change them.
+    """
+
+    CACHE_CELLS = 1 << 18
+
+    def __init__(self, maze, warp_rows=WARP_ROWS, distances=None):
+        self.rows = len(maze)
+        self.cols = len(maze[0])
+        self.distances = distances
+        if distances is not None:
+            self.index, self.cells, self.has_warp = distances.index, distances.cells, distances.has_warp
+            self._walks = np.frombuffer(distances.table, dtype=np.uint16).reshape(distances.size, distances.size)
+        else:
+            self.index, self.cells = open_cells(maze, warp_rows)
+            self._neighbors, self.has_warp = neighbor_lists(maze, self.index, self.cells, warp_rows)
+        self._open = np.frombuffer(self.index, dtype=np.int32).reshape(self.rows, self.cols) >= 0
+        self._cell_rows, self._cell_cols = np.indices((self.rows, self.cols))
+        self.origin = None
+        self.grid = None
+        self._grids = {}
+        self._cache_size = max(1, self.CACHE_CELLS // (self.rows * self.cols))
+
+    def update(self, origin):
+        origin = (origin[0], origin[1])
+        if origin == self.origin:
+            return
+        self.origin = origin
+        grid = self._grids.get(origin)
+        if grid is None:
+            if len(self._grids) >= self._cache_size:
+                self._grids.clear()
+            grid = self._grids[origin] = self._grid(origin)
+        self.grid = grid
+
+    def _grid(self, origin):
+        r0, c0 = origin
+        grid = (np.abs(self._cell_rows - r0) + np.abs(self._cell_cols - c0)).astype(float)
+        source = self.index[r0 * self.cols + c0]
+        if source >= 0:
+            if self.distances is not None:
+                dist = self._walks[source].astype(float)
+                dist[dist == UNREACHABLE] = np.inf
+            else:
+                dist = self._bfs(source)
+            grid[self._open] = dist
+        return grid.tolist()
+
+    def _bfs(self, source):
+        neighbors = self._neighbors
+        dist = [-1] * len(self.cells)
+        dist[source] = 0
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            step = dist[current] + 1
+            for neighbor in neighbors[current]:
+                if dist[neighbor] < 0:
+                    dist[neighbor] = step
+                    queue.append(neighbor)
+        dist = np.array(dist, dtype=float)
+        dist[dist < 0] = np.inf
+        return dist
+
+def distance_table(maze, max_cells=MAX_TABLE_CELLS, warp_rows=WARP_ROWS):
+    """Return the DistanceTable for this maze's walls and warp rows, building it on first use.
+
+    Tables are cached by wall layout, so eating pellets or restarting a level
+    reuses the table that was built for it. A table grows with the square of
+    the open cells, so mazes with more than max_cells of them get None and
+    callers fall back to the heuristic.
+    """
+    if sum(cell != 1 for row in maze for cell in row) > max_cells:
+        return None
+    key = (len(maze[0]), tuple(warp_rows), bytes(cell == 1 for row in maze for cell in row))
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = DistanceTable(maze, warp_rows)
+    return table
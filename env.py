@@ -0,0 +1,218 @@
+# pacman/env.py
+"""Gymnasium-style environments for training agents against the game.
+
+    env = PacmanEnv(max_ticks=5000)
+    obs, info = env.reset(seed=0)
+    obs, reward, terminated, truncated, info = env.step(RIGHT)
+
+PacmanEnv plays one Simulation with the caller's actions (the codes in
+constants) and rewards the points scored on each tick. The observation is a
+uint8 (CHANNELS, rows, cols) grid: the maze cell codes as they stand, with
+eaten pellets cleared, then one plane each for Pac-Man, the active ghosts
+and the frightened ones. It is kept up to date in place: the cell planes
+are copied from the level's grid when a level starts and only Pac-Man's
+cell is touched after that, and the entity planes are cleared and set by
+indexing with the ghost arrays. env.obs is therefore the same array after
+every step, so copy it if an older observation has to be kept.
+
+AsyncVectorEnv runs many PacmanEnvs in worker processes whose observations
+live in one shared-memory block. Workers write straight into it, so only
+the actions, rewards and done flags go through the pipes. Finished games start
+over on their own, as with Gymnasium's autoreset.
+"""
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from .config import DEFAULT_CONFIG
+from .constants import WARP_RIGHT
+from .layouts import LEVELS, as_layout
+from .simulation import Simulation, episode_result
+
+CELLS, PACMAN, GHOSTS, FRIGHTENED = range(4)
+CHANNELS = 4
+ACTION_COUNT = WARP_RIGHT + 1
+
+class PacmanEnv:
+    """One game, stepped by the caller's actions; see the module docstring.
+
+    Every level of mazes has to be the same size. When out is given, the
+    observation is written into it instead of an array of the env's own.
+    seed_stride is how far each reset without a seed moves the seed on.
+    """
+
+    def __init__(self, level=0, mazes=LEVELS, max_ticks=None, out=None, config=DEFAULT_CONFIG, seed_stride=1):
+        self.level = level
+        self.mazes = mazes
+        self.config = config
+        self.max_ticks = max_ticks
+        self.seed_stride = seed_stride
+        first = as_layout(mazes[level])
+        self.observation_shape = (CHANNELS, first.rows, first.cols)
+        self.action_count = ACTION_COUNT
+        if out is None:
+            out = np.zeros(self.observation_shape, dtype=np.uint8)
+        elif out.shape != self.observation_shape or out.dtype != np.uint8:
+            raise ValueError(f"out must be a uint8 array of shape {self.observation_shape}")
+        self.obs = out
+        self.sim = None
+        self._seed = None
+        self._layout = None
+        self._entities = ([], [])
+
+    def reset(self, seed=None, options=None):
+        """Start a new game; returns (obs, info).
+
+        With a seed the game is Simulation(seed=seed); later resets without
+        one play seed + seed_stride, seed + 2 * seed_stride and so on.
+        """
+        if seed is not None:
+            self._seed = seed
+        elif self._seed is not None:
+            self._seed += self.seed_stride
+        self.sim = Simulation(self.level, seed=self._seed, mazes=self.mazes, config=self.config)
+        self._layout = None
+        self._observe()
+        return self.obs, self._info()
+
+    def step(self, action):
+        """Play one tick with action; returns (obs, reward, terminated, truncated, info)."""
+        sim = self.sim
+        score = sim.score
+        sim.step(int(action))
+        self._observe()
+        truncated = not sim.done and self.max_ticks is not None and sim.ticks >= self.max_ticks
+        return self.obs, sim.score - score, sim.done, truncated, self._info()
+
+    def _info(self):
+        sim = self.sim
+        return {"score": sim.score, "level": sim.level, "ticks": sim.ticks, "power_timer": sim.power_timer}
+
+    def _observe(self):
+        sim, obs = self.sim, self.obs
+        r, c = sim.pacman_pos
+        if sim.layout is not self._layout:
+            self._layout = sim.layout
+            if sim.layout.grid.shape != obs.shape[1:]:
+                raise ValueError(f"Level {sim.level + 1} is {sim.layout.rows}x{sim.layout.cols}, "
+                                 f"the observation {obs.shape[1]}x{obs.shape[2]}")
+            np.copyto(obs[CELLS], sim.layout.grid)
+        obs[CELLS, r, c] = sim.maze[r][c]
+        rows, cols = self._entities
+        obs[PACMAN:, rows, cols] = 0
+        ghosts = sim.ghosts
+        active = [i for i, on in enumerate(ghosts.active()) if on]
+        rows, cols = [ghosts.rows[i] for i in active], [ghosts.cols[i] for i in active]
+        obs[PACMAN, r, c] = 1
+        obs[GHOSTS, rows, cols] = 1
+        obs[FRIGHTENED, rows, cols] = [ghosts.frightened[i] for i in active]
+        self._entities = ([r, *rows], [c, *cols])
+
+def _worker(conn, name, shape, start, stop, kwargs):
+    memory = shared_memory.SharedMemory(name=name)
+    obs = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+    # Game k plays seed + k, then seed + k + num_envs and so on, so no two
+    # games of the vector ever play the same seed
+    envs = [PacmanEnv(out=obs[k], seed_stride=shape[0], **kwargs) for k in range(start, stop)]
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == "reset":
+                for k, env in enumerate(envs):
+                    env.reset(None if data is None else data + start + k)
+                conn.send(None)
+            elif command == "step":
+                results = {}
+                rewards, terminated, truncated = [], [], []
+                for k, (env, action) in enumerate(zip(envs, data)):
+                    _, reward, done, cut, _ = env.step(action)
+                    rewards.append(reward)
+                    terminated.append(done)
+                    truncated.append(cut)
+                    if done or cut:
+                        result = episode_result(env.sim)
+                        if cut:
+                            result["cause"] = "timeout"
+                        results[start + k] = result
+                        env.reset()
+                conn.send((rewards, terminated, truncated, results))
+            else:
+                break
+    finally:
+        conn.close()
+
+class AsyncVectorEnv:
+    """num_envs PacmanEnvs spread over worker processes, observed through shared memory.
+
+    reset() and step() return self.obs, a (num_envs, CHANNELS, rows, cols)
+    view of the shared block, which the next call overwrites. Game k is
+    seeded seed + k on reset(seed), and its later games seed + k + num_envs,
+    seed + k + 2 * num_envs and so on. A game that ends is reset in the same
+    step, so the observation is already the next game's first; its
+    episode_result() is in info["final_result"][k], None for the others.
+    """
+
+    def __init__(self, num_envs, workers=None, seed=None, **kwargs):
+        self.num_envs = num_envs
+        self.seed = seed
+        workers = min(num_envs, workers or mp.cpu_count() or 1)
+        shape = PacmanEnv(**kwargs).observation_shape
+        self.observation_shape = (num_envs, *shape)
+        self.action_count = ACTION_COUNT
+        self._memory = shared_memory.SharedMemory(create=True, size=int(np.prod(self.observation_shape)))
+        self.obs = np.ndarray(self.observation_shape, dtype=np.uint8, buffer=self._memory.buf)
+        self._pipes, self._processes, self._slices = [], [], []
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int).tolist()
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            conn, child = mp.Pipe()
+            process = mp.Process(target=_worker, args=(child, self._memory.name, self.observation_shape, start, stop, kwargs),
+                                 daemon=True)
+            process.start()
+            child.close()
+            self._pipes.append(conn)
+            self._processes.append(process)
+            self._slices.append(slice(start, stop))
+
+    def reset(self, seed=None, options=None):
+        """Start every game over; returns (obs, info)."""
+        if seed is not None:
+            self.seed = seed
+        for conn in self._pipes:
+            conn.send(("reset", self.seed))
+        for conn in self._pipes:
+            conn.recv()
+        self.seed = None
+        return self.obs, {}
+
+    def step(self, actions):
+        """Play one tick of every game; returns (obs, rewards, terminated, truncated, info)."""
+        actions = np.asarray(actions).tolist()
+        for conn, games in zip(self._pipes, self._slices):
+            conn.send(("step", actions[games]))
+        rewards = np.empty(self.num_envs, dtype=np.int64)
+        terminated = np.empty(self.num_envs, dtype=bool)
+        truncated = np.empty(self.num_envs, dtype=bool)
+        final = [None] * self.num_envs
+        for conn, games in zip(self._pipes, self._slices):
+            rewards[games], terminated[games], truncated[games], results = conn.recv()
+            for k, result in results.items():
+                final[k] = result
+        return self.obs, rewards, terminated, truncated, {"final_result": final}
+
+    def close(self):
+        if self._memory is None:
+            return
+        for conn in self._pipes:
+            conn.send(("close", None))
+            conn.close()
+        for process in self._processes:
+            process.join()
+        del self.obs
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,94 @@
+# pacman/events.py
+"""Logging and game event recording.
+
+Diagnostics go through the "pacman" logger: per-tick agent chatter at DEBUG,
+game milestones (ghost eaten, game over, level start) at INFO. Nothing is
+shown unless logging is configured for it.
+
+Simulation(events=sink) also records game events to a sink for post-mortems.
+A sink buffers (tick, event, pos, value) records and writes them as JSONL or
+as fixed-size binary records; open_event_sink() picks one by file extension.
+"""
+import json
+import logging
+import struct
+
+log = logging.getLogger("pacman")
+
+# Event types, with what pos and value hold for each
+EVENTS = (
+    "level_start",   # Pac-Man's start cell, the level index
+    "replan",        # the agent's new target, the planned path length
+    "warp",          # the cell Pac-Man warped to, 0
+    "pellet",        # where it was eaten, the score after it
+    "power_pellet",  # where it was eaten, the score after it
+    "eat_ghost",     # where it was eaten, the points it scored
+    "power_end",     # Pac-Man's cell, the ghosts eaten during power mode
+    "game_over",     # Pac-Man's cell, the final score
+    "win",           # Pac-Man's cell, the final score
+)
+EVENT_CODES = {event: code for code, event in enumerate(EVENTS)}
+
+class EventSink:
+    """Buffers event records and writes them out buffer_size at a time."""
+
+    def __init__(self, stream, buffer_size=4096):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer = []
+
+    def emit(self, tick, event, pos=None, value=0):
+        self.buffer.append((tick, event, pos, value))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self._write(self.buffer)
+            self.buffer = []
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JsonlEventSink(EventSink):
+    """One JSON object per event: {"tick", "event", "pos", "value"}."""
+
+    def _write(self, records):
+        self.stream.write("".join(
+            json.dumps({"tick": tick, "event": event, "pos": None if pos is None else [pos[0], pos[1]], "value": value}) + "\n"
+            for tick, event, pos, value in records))
+
+class BinaryEventSink(EventSink):
+    """Fixed 15-byte little-endian records: tick, event code, row, col, value.
+
+    A missing pos is stored as (-1, -1); read_binary_events() decodes a file.
+    """
+
+    RECORD = struct.Struct("<IBhhi")
+
+    def _write(self, records):
+        pack = self.RECORD.pack
+        self.stream.write(b"".join(
+            pack(tick, EVENT_CODES[event], *(pos if pos is not None else (-1, -1)), value)
+            for tick, event, pos, value in records))
+
+def read_binary_events(path):
+    """Yield the (tick, event, pos, value) records of a BinaryEventSink file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    for tick, code, row, col, value in BinaryEventSink.RECORD.iter_unpack(data):
+        yield tick, EVENTS[code], None if row < 0 else (row, col), value
+
+def open_event_sink(path, buffer_size=4096):
+    """A BinaryEventSink for a .bin path, otherwise a JsonlEventSink."""
+    if path.endswith(".bin"):
+        return BinaryEventSink(open(path, "wb"), buffer_size)
+    return JsonlEventSink(open(path, "w"), buffer_size)
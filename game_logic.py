@@ -1,222 +1,410 @@
-# pacman/game_logic.py
-from heapq import heappush, heappop
-import random
-from .constants import ROWS, COLS, WARP_ROW, GHOST_SPAWN, RESPAWN_DELAY, POWER_MODE_DELAY, MAZES, BLUE, RED, PINK, ORANGE
-
-def heuristic(a, b):
-    base_dist = abs(a[0] - b[0]) + abs(a[1] - b[1])
-    if a[0] == WARP_ROW and b[0] == WARP_ROW:
-        warp_dist = min(abs(a[1] - b[1]), abs(a[1] - 0) + abs(b[1] - (COLS-1)) + 1, abs(a[1] - (COLS-1)) + abs(b[1] - 0) + 1)
-        return min(base_dist, warp_dist)
-    return base_dist
-
-def is_path_safe(pacman_pos, target, ghosts, maze, safe_dist=4):
-    """Check if the straight-line path to the target is safe from ghosts."""
-    for ghost in ghosts:
-        if not ghost["eaten"] and ghost["respawn_timer"] == 0:
-            ghost_pos = ghost["pos"]
-            # Approximate straight-line path by checking points between Pac-Man and target
-            for t in range(1, 11):
-                t = t / 10
-                interp_row = pacman_pos[0] + t * (target[0] - pacman_pos[0])
-                interp_col = pacman_pos[1] + t * (target[1] - pacman_pos[1])
-                interp_pos = (interp_row, interp_col)
-                dist_to_ghost = heuristic(interp_pos, ghost_pos)
-                if dist_to_ghost < safe_dist:
-                    print(f"Path to {target} is unsafe: ghost at {ghost_pos} too close (dist={dist_to_ghost})")
-                    return False
-    return True
-
-def a_star(start, goal, maze, ghosts, power_mode):
-    open_set = []
-    heappush(open_set, (0, start))
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: heuristic(start, goal)}
-    while open_set:
-        current = heappop(open_set)[1]
-        if current == goal:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.append(start)
-            return path[::-1]
-        neighbors = []
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            neighbor = (current[0] + dr, current[1] + dc)
-            if 0 <= neighbor[0] < ROWS and 0 <= neighbor[1] < COLS and maze[neighbor[0]][neighbor[1]] != 1:
-                ghost_penalty = 0
-                if not power_mode:
-                    for ghost in ghosts:
-                        if not ghost["eaten"] and ghost["respawn_timer"] == 0:
-                            dist_to_ghost = heuristic(neighbor, tuple(ghost["pos"]))
-                            if dist_to_ghost < 4:  # Increased radius
-                                ghost_penalty += 100  # Increased penalty
-                neighbors.append((neighbor, 1 + ghost_penalty))
-        if abs(current[0] - WARP_ROW) <= 2:
-            if current[1] == 0 or heuristic(current, (WARP_ROW, 0)) <= 2:
-                neighbors.append(((WARP_ROW, COLS-1), 0.1))
-                print(f"Added warp path to [7, {COLS-1}] from {current}")
-            if current[1] == COLS-1 or heuristic(current, (WARP_ROW, COLS-1)) <= 2:
-                neighbors.append(((WARP_ROW, 0), 0.1))
-                print(f"Added warp path to [7, 0] from {current}")
-        for neighbor, cost in neighbors:
-            tentative_g_score = g_score[current] + cost
-            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = g_score[neighbor] + heuristic(neighbor, goal)
-                heappush(open_set, (f_score[neighbor], neighbor))
-    print(f"No path from {start} to {goal}")
-    return None
-
-def find_target(pacman_pos, maze, ghosts, power_mode, power_timer):
-    nearest_ghost_dist = float('inf')
-    nearest_ghost_pos = None
-    ghost_count_within_5 = 0
-    for ghost in ghosts:
-        if not ghost["eaten"] and ghost["respawn_timer"] == 0:
-            dist = heuristic(pacman_pos, ghost["pos"])
-            if dist < nearest_ghost_dist:
-                nearest_ghost_dist = dist
-                nearest_ghost_pos = ghost["pos"]
-            if dist < 5:
-                ghost_count_within_5 += 1
-    if power_mode:
-        min_dist = float('inf')
-        target = None
-        for ghost in ghosts:
-            if not ghost["eaten"] and ghost["respawn_timer"] == 0:
-                dist = heuristic(pacman_pos, ghost["pos"])
-                if dist < min_dist:
-                    min_dist = dist
-                    target = tuple(ghost["pos"])
-        if target:
-            print(f"Chasing ghost at {target} in power mode")
-            return target
-    if not power_mode and (nearest_ghost_dist < 4 or ghost_count_within_5 >= 2):
-        min_score = float('inf')
-        target = None
-        for r in range(ROWS):
-            for c in range(COLS):
-                if maze[r][c] == 3:
-                    dist = heuristic(pacman_pos, (r, c))
-                    too_close_to_ghost = any(heuristic((r, c), ghost["pos"]) < 1.5 for ghost in ghosts if not ghost["eaten"] and ghost["respawn_timer"] == 0)
-                    path_safe = is_path_safe(pacman_pos, (r, c), ghosts, maze)
-                    if not too_close_to_ghost and path_safe:
-                        score = dist / 2
-                        if score < min_score:
-                            min_score = score
-                            target = (r, c)
-        if target:
-            print(f"Targeting power pellet at {target} to escape danger")
-            return target
-        warp_0 = (WARP_ROW, 0)
-        warp_29 = (WARP_ROW, COLS-1)
-        dist_to_warp_0 = heuristic(warp_0, nearest_ghost_pos)
-        dist_to_warp_29 = heuristic(warp_29, nearest_ghost_pos)
-        target = warp_0 if dist_to_warp_0 > dist_to_warp_29 else warp_29
-        print(f"Fleeing to warp tunnel at {target}, ghost at {nearest_ghost_pos}")
-        return target
-    min_score = float('inf')
-    target = None
-    spawn_avoidance_radius = 2 if (power_mode and power_timer < 30) else 1
-    for r in range(ROWS):
-        for c in range(COLS):
-            if maze[r][c] in [2, 3]:
-                dist = heuristic(pacman_pos, (r, c))
-                too_close_to_ghost = (not power_mode and any(heuristic((r, c), ghost["pos"]) < 4 for ghost in ghosts if not ghost["eaten"] and ghost["respawn_timer"] == 0))
-                too_close_to_spawn = heuristic((r, c), GHOST_SPAWN) < spawn_avoidance_radius
-                path_safe = is_path_safe(pacman_pos, (r, c), ghosts, maze)
-                if not too_close_to_ghost and not too_close_to_spawn and path_safe:
-                    score = dist / 2 if maze[r][c] == 3 else dist - (2 if c >= 14 else 0)
-                    if score < min_score:
-                        min_score = score
-                        target = (r, c)
-    return target
-
-def move_ghost(ghost, maze, pacman_pos, power_mode):
-    if ghost["eaten"] or ghost["respawn_timer"] > 0 or ghost["start_delay"] > 0:
-        ghost["start_delay"] = max(0, ghost["start_delay"] - 1)
-        return
-    if ghost["warp_delay"] > 0:
-        ghost["warp_delay"] -= 1
-        return
-    ghost["move_timer"] += 1
-    speed_threshold = 3.6 if ghost["slowdown_timer"] > 0 else 1.65
-    if ghost["move_timer"] < speed_threshold:
-        return
-    ghost["move_timer"] = 0
-    if ghost["slowdown_timer"] > 0:
-        ghost["slowdown_timer"] -= 1
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    new_row = ghost["pos"][0]
-    new_col = ghost["pos"][1]
-    if power_mode:
-        if not ghost["was_in_power_mode"]:
-            move = (-ghost["last_move"][0], -ghost["last_move"][1]) if ghost["last_move"] != (0, 0) else random.choice(directions)
-            ghost["was_in_power_mode"] = True
-        else:
-            valid_directions = [(dr, dc) for dr, dc in directions 
-                               if 0 <= new_row + dr < ROWS and 0 <= new_col + dc < COLS 
-                               and maze[new_row + dr][new_col + dc] != 1 
-                               and (heuristic([new_row + dr, new_col + dc], pacman_pos) <= 8 or random.random() < 0.2)]
-            move = random.choice(valid_directions or directions)
-    else:
-        ghost["was_in_power_mode"] = False
-        row_diff = pacman_pos[0] - ghost["pos"][0]
-        col_diff = pacman_pos[1] - ghost["pos"][1]
-        move = (0, 0)
-        if abs(row_diff) > abs(col_diff):
-            move = (1 if row_diff > 0 else -1, 0)
-        else:
-            move = (0, 1 if col_diff > 0 else -1)
-        if random.random() < 0.25:
-            move = random.choice(directions)
-    new_row += move[0]
-    new_col += move[1]
-    if new_row == WARP_ROW:
-        if new_col < 0:
-            new_col = COLS - 1
-            ghost["warp_delay"] = 22.5
-            ghost["slowdown_timer"] = 45
-            print(f"Ghost warped from [{new_row}, 0] to [{new_row}, {new_col}]")
-        elif new_col >= COLS:
-            new_col = 0
-            ghost["warp_delay"] = 22.5
-            ghost["slowdown_timer"] = 45
-            print(f"Ghost warped from [{new_row}, {COLS-1}] to [{new_row}, {new_col}]")
-    if 0 <= new_row < ROWS and 0 <= new_col < COLS and maze[new_row][new_col] != 1:
-        ghost["pos"][0] = new_row
-        ghost["pos"][1] = new_col
-        ghost["last_move"] = move
-
-def check_collision(pacman_pos, ghosts, power_mode, score, ghosts_eaten):
-    for ghost in ghosts:
-        if not ghost["eaten"] and ghost["respawn_timer"] == 0:
-            if pacman_pos[0] == ghost["pos"][0] and pacman_pos[1] == ghost["pos"][1]:
-                if power_mode:
-                    ghost["eaten"] = True
-                    ghost["respawn_timer"] = RESPAWN_DELAY
-                    ghost["color"] = ghost["base_color"]
-                    print(f"Ate ghost at {ghost['pos']} (color: {ghost['color']})")
-                    score += 200 * (ghosts_eaten + 1)
-                    ghosts_eaten += 1
-                    return "eat_ghost", score, ghosts_eaten, True
-                else:
-                    print(f"Game Over! Collided with ghost at {ghost['pos']}. Score: {score}")
-                    return "game_over", score, ghosts_eaten, False
-    return None, score, ghosts_eaten, False
-
-def reset_level(current_level):
-    maze = [row[:] for row in MAZES[current_level]]
-    pacman_pos = [1, 1]
-    direction = "RIGHT"
-    ghosts = [
-        {"pos": [10, 15], "color": RED, "base_color": RED, "eaten": False, "respawn_timer": 0, "move_timer": 0, "start_delay": 0, "last_move": (0, 0), "was_in_power_mode": False, "warp_delay": 0, "slowdown_timer": 0},
-        {"pos": [10, 16], "color": PINK, "base_color": PINK, "eaten": False, "respawn_timer": 0, "move_timer": 0, "start_delay": 15, "last_move": (0, 0), "was_in_power_mode": False, "warp_delay": 0, "slowdown_timer": 0},
-        {"pos": [11, 15], "color": ORANGE, "base_color": ORANGE, "eaten": False, "respawn_timer": 0, "move_timer": 0, "start_delay": 30, "last_move": (0, 0), "was_in_power_mode": False, "warp_delay": 0, "slowdown_timer": 0},
-        {"pos": [11, 16], "color": BLUE, "base_color": BLUE, "eaten": False, "respawn_timer": 0, "move_timer": 0, "start_delay": 45, "last_move": (0, 0), "was_in_power_mode": False, "warp_delay": 0, "slowdown_timer": 0}
-    ]
-    return maze, pacman_pos, direction, ghosts
+# pacman/game_logic.py
+from heapq import heappush, heappop
+import logging
+import random
+from .config import DEFAULT_CONFIG
+from .events import log
+from .ghosts import GhostSet
+from .layouts import LEVELS, as_layout
+from .pellets import PelletIndex
+from .constants import COLS, WARP_ROW, WARP_ROWS, GHOST_SPAWN, RESPAWN_DELAY, BLUE, RED, PINK, ORANGE
+from .constants import NOOP, UP, DOWN, LEFT, RIGHT, STAY, WARP_LEFT, WARP_RIGHT
+
+ACTION_DELTAS = {UP: (-1, 0), DOWN: (1, 0), LEFT: (0, -1), RIGHT: (0, 1), STAY: (0, 0)}
+
+def heuristic(a, b, cols=COLS, warp_rows=WARP_ROWS):
+    base_dist = abs(a[0] - b[0]) + abs(a[1] - b[1])
+    if a[0] == b[0] and a[0] in warp_rows:
+        warp_dist = min(abs(a[1] - b[1]), abs(a[1] - 0) + abs(b[1] - (cols-1)) + 1, abs(a[1] - (cols-1)) + abs(b[1] - 0) + 1)
+        return min(base_dist, warp_dist)
+    return base_dist
+
+def is_path_safe(pacman_pos, target, ghosts, maze, safe_dist=4, danger=None, warp_rows=WARP_ROWS):
+    """Check if the straight-line path to the target is safe from ghosts."""
+    cols = len(maze[0])
+    if danger is not None:
+        for t in range(1, 11):
+            t = t / 10
+            interp_row = pacman_pos[0] + t * (target[0] - pacman_pos[0])
+            interp_col = pacman_pos[1] + t * (target[1] - pacman_pos[1])
+            # The nearest-ghost distance of the cell this point rounds to, less
+            # the rounding offset, is a lower bound on the point's own distance;
+            # only points that fail it need the exact per-ghost check.
+            r, c = int(interp_row + 0.5), int(interp_col + 0.5)
+            if danger.nearest_rows[r][c] - abs(interp_row - r) - abs(interp_col - c) >= safe_dist:
+                continue
+            for ghost_pos in danger.ghosts:
+                dist_to_ghost = heuristic((interp_row, interp_col), ghost_pos, cols, warp_rows)
+                if dist_to_ghost < safe_dist:
+                    log.debug("Path to %s is unsafe: ghost at %s too close (dist=%s)", target, ghost_pos, dist_to_ghost)
+                    return False
+        return True
+    for ghost_pos in ghosts.active_positions():
+        # Approximate straight-line path by checking points between Pac-Man and target
+        for t in range(1, 11):
+            t = t / 10
+            interp_row = pacman_pos[0] + t * (target[0] - pacman_pos[0])
+            interp_col = pacman_pos[1] + t * (target[1] - pacman_pos[1])
+            interp_pos = (interp_row, interp_col)
+            dist_to_ghost = heuristic(interp_pos, ghost_pos, cols, warp_rows)
+            if dist_to_ghost < safe_dist:
+                log.debug("Path to %s is unsafe: ghost at %s too close (dist=%s)", target, ghost_pos, dist_to_ghost)
+                return False
+    return True
+
+def a_star(start, goal, maze, ghosts, power_mode, danger=None, stats=None, warp_rows=WARP_ROWS, ghost_radius=4, ghost_penalty=100):
+    """Path [start, ..., goal] avoiding ghosts, or None.
+
+    Without a danger field, each step within ghost_radius of a ghost costs
+    ghost_penalty more per ghost. When stats is a dict, the number of nodes
+    expanded is added to stats["expanded"].
+    """
+    rows, cols = len(maze), len(maze[0])
+    penalties = danger.cost_rows if danger is not None and not power_mode else None
+    debug = log.isEnabledFor(logging.DEBUG)
+    ghost_positions = ghosts.active_positions() if penalties is None and not power_mode else []
+    open_set = []
+    heappush(open_set, (0, start))
+    came_from = {}
+    g_score = {start: 0}
+    f_score = {start: heuristic(start, goal, cols, warp_rows)}
+    expanded = 0
+    while open_set:
+        current = heappop(open_set)[1]
+        expanded += 1
+        if current == goal:
+            if stats is not None:
+                stats["expanded"] = stats.get("expanded", 0) + expanded
+            path = []
+            while current in came_from:
+                path.append(current)
+                current = came_from[current]
+            path.append(start)
+            return path[::-1]
+        neighbors = []
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            neighbor = (current[0] + dr, current[1] + dc)
+            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols and maze[neighbor[0]][neighbor[1]] != 1:
+                penalty = 0
+                if penalties is not None:
+                    penalty = penalties[neighbor[0]][neighbor[1]]
+                elif not power_mode:
+                    for ghost_pos in ghost_positions:
+                        dist_to_ghost = heuristic(neighbor, ghost_pos, cols, warp_rows)
+                        if dist_to_ghost < ghost_radius:
+                            penalty += ghost_penalty
+                neighbors.append((neighbor, 1 + penalty))
+        # The same warps as the WARP_LEFT and WARP_RIGHT actions (see warp_end())
+        for end_col in (cols-1, 0):
+            end = warp_end(current, end_col, cols, warp_rows)
+            if end is not None:
+                neighbors.append((end, 0.1))
+                if debug:
+                    log.debug("Added warp path to [%s, %s] from %s", end[0], end[1], current)
+        for neighbor, cost in neighbors:
+            tentative_g_score = g_score[current] + cost
+            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                f_score[neighbor] = g_score[neighbor] + heuristic(neighbor, goal, cols, warp_rows)
+                heappush(open_set, (f_score[neighbor], neighbor))
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    log.debug("No path from %s to %s", start, goal)
+    return None
+
+def can_warp(pos, end_col, cols=COLS, warp_row=WARP_ROW):
+    """Whether a_star() offers a warp from pos to (warp_row, end_col)."""
+    if abs(pos[0] - warp_row) > 2:
+        return False
+    near_col = cols - 1 - end_col
+    return pos[1] == near_col or heuristic(pos, (warp_row, near_col), cols, (warp_row,)) <= 2
+
+def warp_end(pos, end_col, cols=COLS, warp_rows=WARP_ROWS):
+    """The (row, end_col) tunnel end pos can warp to, trying warp_rows in order, or None.
+
+    This is the one warp rule: the warp actions, a_star() and the distance
+    table all take it, so within reach of two warp rows every one of them
+    goes through the first.
+    """
+    for warp_row in warp_rows:
+        if can_warp(pos, end_col, cols, warp_row):
+            return (warp_row, end_col)
+    return None
+
+def action_target(pos, action, maze, warp_rows=WARP_ROWS):
+    """The cell an action moves Pac-Man to, or None if it leaves him where he is.
+
+    Steps into a wall or off the grid do not move him; warps are allowed
+    from the same cells as in a_star(), wherever they land. Within reach of
+    two warp rows, a warp goes through the first of them.
+    """
+    rows, cols = len(maze), len(maze[0])
+    if action in ACTION_DELTAS:
+        dr, dc = ACTION_DELTAS[action]
+        r, c = pos[0] + dr, pos[1] + dc
+        if action == STAY or (0 <= r < rows and 0 <= c < cols and maze[r][c] != 1):
+            return (r, c)
+    elif action == WARP_LEFT:
+        return warp_end(pos, 0, cols, warp_rows)
+    elif action == WARP_RIGHT:
+        return warp_end(pos, cols - 1, cols, warp_rows)
+    return None
+
+def action_for(pos, next_pos, maze, warp_rows=WARP_ROWS):
+    """The action that moves Pac-Man from pos to next_pos, or NOOP if none does."""
+    next_pos = tuple(next_pos)
+    for action in (STAY, UP, DOWN, LEFT, RIGHT, WARP_LEFT, WARP_RIGHT):
+        if action_target(pos, action, maze, warp_rows) == next_pos:
+            return action
+    return NOOP
+
+def find_target(pacman_pos, maze, ghosts, power_mode, power_timer, distances=None, pellets=None, danger=None,
+                warp_rows=WARP_ROWS, spawn=GHOST_SPAWN, pacman_map=None, safe_dist=4):
+    """The cell Pac-Man should head for next, or None.
+
+    Distances from Pac-Man are read off pacman_map, a DistanceMap rooted at
+    his cell, when one is given. Targets are only taken when the way there
+    keeps safe_dist from the ghosts (see is_path_safe()).
+    """
+    cols = len(maze[0])
+    distance = distances.maze_distance if distances else (lambda a, b: heuristic(a, b, cols, warp_rows))
+    if pacman_map is not None:
+        pacman_map.update(pacman_pos)
+        grid = pacman_map.grid
+        from_pacman = lambda pos: grid[pos[0]][pos[1]]
+    else:
+        from_pacman = lambda pos: distance(pacman_pos, pos)
+    if pellets is None:
+        pellets = PelletIndex(maze)
+    active = ghosts.active_positions()
+    nearest_ghost_dist = float('inf')
+    nearest_ghost_pos = None
+    ghost_count_within_5 = 0
+    for ghost_pos in active:
+        dist = from_pacman(ghost_pos)
+        if dist < nearest_ghost_dist:
+            nearest_ghost_dist = dist
+            nearest_ghost_pos = ghost_pos
+        if dist < 5:
+            ghost_count_within_5 += 1
+    if power_mode:
+        # The nearest active ghost, first one on ties
+        target = nearest_ghost_pos
+        if target:
+            log.debug("Chasing ghost at %s in power mode", target)
+            return target
+    if not power_mode and (nearest_ghost_dist < 4 or ghost_count_within_5 >= 2):
+        min_score = float('inf')
+        target = None
+        for r, c in sorted(pellets.power):
+            dist = from_pacman((r, c))
+            if danger is not None:
+                too_close_to_ghost = danger.walk_rows[r][c] < 1.5
+            else:
+                too_close_to_ghost = any(distance((r, c), ghost_pos) < 1.5 for ghost_pos in active)
+            path_safe = is_path_safe(pacman_pos, (r, c), ghosts, maze, safe_dist, danger, warp_rows)
+            if not too_close_to_ghost and path_safe:
+                score = dist / 2
+                if score < min_score:
+                    min_score = score
+                    target = (r, c)
+        if target:
+            log.debug("Targeting power pellet at %s to escape danger", target)
+            return target
+        # The tunnel end furthest from the ghost, the later one on ties
+        target, max_dist = None, float('-inf')
+        for warp in [(warp_row, col) for warp_row in warp_rows for col in (0, cols-1)]:
+            dist_to_warp = distance(warp, nearest_ghost_pos)
+            if dist_to_warp >= max_dist:
+                target, max_dist = warp, dist_to_warp
+        if target:
+            log.debug("Fleeing to warp tunnel at %s, ghost at %s", target, nearest_ghost_pos)
+            return target
+    min_score = float('inf')
+    target = None
+    spawn_avoidance_radius = 2 if (power_mode and power_timer < 30) else 1
+    # Pellets from the middle column rightwards count two moves nearer
+    right_half = (cols - 1) // 2
+    # Rings of buckets come nearest first; once a ring's Manhattan lower bound
+    # can't beat the best score, no pellet further out can either. Warp
+    # shortcuts break that bound, so those mazes search every ring.
+    walking = pacman_map if pacman_map is not None else distances
+    bounded = walking is not None and not walking.has_warp
+    for min_dist, candidates in pellets.rings(pacman_pos):
+        if bounded and min(min_dist / 2, min_dist - 2) > min_score:
+            break
+        for r, c in candidates:
+            dist = from_pacman((r, c))
+            score = dist / 2 if (r, c) in pellets.power else dist - (2 if c >= right_half else 0)
+            # Ties go to the first cell in row-major order, as a full grid scan would
+            if score > min_score or (score == min_score and (target is None or (r, c) > target)):
+                continue
+            if danger is not None:
+                too_close_to_ghost = not power_mode and danger.walk_rows[r][c] < 4
+            else:
+                too_close_to_ghost = (not power_mode and any(distance((r, c), ghost_pos) < 4 for ghost_pos in active))
+            too_close_to_spawn = distance((r, c), spawn) < spawn_avoidance_radius
+            path_safe = is_path_safe(pacman_pos, (r, c), ghosts, maze, safe_dist, danger, warp_rows)
+            if not too_close_to_ghost and not too_close_to_spawn and path_safe:
+                min_score = score
+                target = (r, c)
+    return target
+
+def ghost_step(pos, move, maze, warp_rows=WARP_ROWS):
+    """The open cell a ghost at pos reaches with move, through a warp tunnel if need be, or None."""
+    rows, cols = len(maze), len(maze[0])
+    r, c = pos[0] + move[0], pos[1] + move[1]
+    if r in warp_rows:
+        c %= cols
+    if 0 <= r < rows and 0 <= c < cols and maze[r][c] != 1:
+        return r, c
+    return None
+
+def move_ghost(ghosts, i, maze, pacman_pos, power_mode, rng=random, warp_rows=WARP_ROWS, pacman_map=None, config=DEFAULT_CONFIG):
+    """Move ghost i one step, when its timers let it.
+
+    With pacman_map, a DistanceMap rooted at Pac-Man, a chasing ghost takes
+    a shortest path to him and a fleeing one prefers steps that take it
+    further away; without one they go by the straight-line heuristic. How
+    often ghosts move, and how often a chasing one moves at random, come
+    from config.
+    """
+    if ghosts.eaten[i] or ghosts.respawn_timer[i] > 0 or ghosts.start_delay[i] > 0:
+        ghosts.start_delay[i] = max(0, ghosts.start_delay[i] - 1)
+        return
+    if ghosts.warp_delay[i] > 0:
+        ghosts.warp_delay[i] -= 1
+        return
+    ghosts.move_timer[i] += 1
+    speed_threshold = config.ghost_slow_move_ticks if ghosts.slowdown_timer[i] > 0 else config.ghost_move_ticks
+    if ghosts.move_timer[i] < speed_threshold:
+        return
+    ghosts.move_timer[i] = 0
+    if ghosts.slowdown_timer[i] > 0:
+        ghosts.slowdown_timer[i] -= 1
+    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    rows, cols = len(maze), len(maze[0])
+    row, col = ghosts.position(i)
+    new_row = row
+    new_col = col
+    if power_mode:
+        if not ghosts.was_in_power_mode[i]:
+            last_move = ghosts.last_move[i]
+            move = (-last_move[0], -last_move[1]) if last_move != (0, 0) else rng.choice(directions)
+            ghosts.was_in_power_mode[i] = True
+        elif pacman_map is not None:
+            grid = pacman_map.grid
+            here = grid[row][col]
+            valid_directions = []
+            for move in directions:
+                step = ghost_step((row, col), move, maze, warp_rows)
+                if step is not None and (grid[step[0]][step[1]] > here or rng.random() < 0.2):
+                    valid_directions.append(move)
+            move = rng.choice(valid_directions or directions)
+        else:
+            valid_directions = [(dr, dc) for dr, dc in directions 
+                               if 0 <= new_row + dr < rows and 0 <= new_col + dc < cols 
+                               and maze[new_row + dr][new_col + dc] != 1 
+                               and (heuristic([new_row + dr, new_col + dc], pacman_pos, cols, warp_rows) <= 8 or rng.random() < 0.2)]
+            move = rng.choice(valid_directions or directions)
+    else:
+        ghosts.was_in_power_mode[i] = False
+        row_diff = pacman_pos[0] - row
+        col_diff = pacman_pos[1] - col
+        move = None
+        if pacman_map is not None:
+            # The first direction on a shortest path, if Pac-Man can be reached
+            grid = pacman_map.grid
+            best = float("inf")
+            for direction in directions:
+                step = ghost_step((row, col), direction, maze, warp_rows)
+                if step is not None and grid[step[0]][step[1]] < best:
+                    move, best = direction, grid[step[0]][step[1]]
+        if move is None:
+            if abs(row_diff) > abs(col_diff):
+                move = (1 if row_diff > 0 else -1, 0)
+            else:
+                move = (0, 1 if col_diff > 0 else -1)
+        if rng.random() < config.ghost_random_rate:
+            move = rng.choice(directions)
+    new_row += move[0]
+    new_col += move[1]
+    if new_row in warp_rows:
+        if new_col < 0:
+            new_col = cols - 1
+            ghosts.warp_delay[i] = 22.5
+            ghosts.slowdown_timer[i] = 45
+            log.debug("Ghost warped from [%s, 0] to [%s, %s]", new_row, new_row, new_col)
+        elif new_col >= cols:
+            new_col = 0
+            ghosts.warp_delay[i] = 22.5
+            ghosts.slowdown_timer[i] = 45
+            log.debug("Ghost warped from [%s, %s] to [%s, %s]", new_row, cols-1, new_row, new_col)
+    if 0 <= new_row < rows and 0 <= new_col < cols and maze[new_row][new_col] != 1:
+        ghosts.rows[i] = new_row
+        ghosts.cols[i] = new_col
+        ghosts.last_move[i] = move
+
+def move_all(ghosts, maze, pacman_pos, power_mode, rng=random, after_move=None, warp_rows=WARP_ROWS, spawn=GHOST_SPAWN,
+             pacman_map=None, config=DEFAULT_CONFIG):
+    """Advance every ghost by one tick, in order.
+
+    Eaten ghosts count down to their respawn at spawn; the others move,
+    all reading the same pacman_map and config (see move_ghost()).
+    after_move(i) is called after each ghost that moved, before the next one
+    does, so a collision it causes is settled first; when it returns true
+    the game is over and the remaining ghosts stay where they are.
+    """
+    if pacman_map is not None:
+        pacman_map.update(pacman_pos)
+    for i in range(len(ghosts)):
+        if ghosts.respawn_timer[i] > 0:
+            ghosts.respawn_timer[i] -= 1
+            if ghosts.respawn_timer[i] == 0:
+                ghosts.eaten[i] = False
+                ghosts.rows[i], ghosts.cols[i] = spawn
+                ghosts.frightened[i] = power_mode
+        else:
+            move_ghost(ghosts, i, maze, pacman_pos, power_mode, rng, warp_rows, pacman_map, config)
+            if after_move is not None and after_move(i):
+                return
+
+def check_collision(pacman_pos, ghosts, power_mode, score, ghosts_eaten):
+    hits = ghosts.at(pacman_pos)
+    if hits:
+        i = hits[0]
+        ghost_pos = list(ghosts.position(i))
+        if power_mode:
+            ghosts.eaten[i] = True
+            ghosts.respawn_timer[i] = RESPAWN_DELAY
+            ghosts.frightened[i] = False
+            log.info("Ate ghost at %s (color: %s)", ghost_pos, ghosts.color(i))
+            score += 200 * (ghosts_eaten + 1)
+            ghosts_eaten += 1
+            return "eat_ghost", score, ghosts_eaten, True
+        else:
+            log.info("Game Over! Collided with ghost at %s. Score: %s", ghost_pos, score)
+            return "game_over", score, ghosts_eaten, False
+    return None, score, ghosts_eaten, False
+
+GHOST_COLORS = [RED, PINK, ORANGE, BLUE]
+
+def reset_level(current_level, mazes=LEVELS):
+    """A fresh maze, Pac-Man's cell, his direction and the ghosts for a level.
+
+    mazes holds Layouts (or plain grids, which get the default start cells).
+    The maze is a list of the layout's shared rows (see Layout.shared_rows()),
+    so no level copies the whole grid: the game copies a row before it
+    eats from it. Ghosts take colors in turn and leave 15 ticks apart.
+    """
+    layout = as_layout(mazes[current_level])
+    maze = list(layout.shared_rows())
+    pacman_pos = list(layout.pacman)
+    direction = "RIGHT"
+    ghosts = GhostSet(
+        positions=layout.ghosts,
+        base_colors=[GHOST_COLORS[i % len(GHOST_COLORS)] for i in range(len(layout.ghosts))],
+        start_delays=[15 * i for i in range(len(layout.ghosts))],
+    )
+    return maze, pacman_pos, direction, ghosts
@@ -0,0 +1,104 @@
+# pacman/ghosts.py
+import numpy as np
+from .constants import BLUE
+
+class GhostSet:
+    """All ghosts of a level as parallel lists, indexed by ghost.
+
+    Ghost i sits at (rows[i], cols[i]). A ghost is active -- on the board and
+    dangerous -- while it is neither eaten nor waiting to respawn. The game
+    moves one ghost at a time, and plain lists index single ghosts several
+    times faster than NumPy arrays do; array(name) and stacked() give the
+    fields as arrays for callers that work on every ghost at once.
+    """
+
+    FIELDS = ("rows", "cols", "frightened", "eaten", "respawn_timer", "move_timer", "start_delay",
+              "last_move", "was_in_power_mode", "warp_delay", "slowdown_timer")
+    DTYPES = {"rows": np.int64, "cols": np.int64, "frightened": bool, "eaten": bool, "respawn_timer": np.int64,
+              "move_timer": np.int64, "start_delay": np.int64, "last_move": np.int64, "was_in_power_mode": bool,
+              "warp_delay": np.float64, "slowdown_timer": np.int64}
+
+    def __init__(self, positions, base_colors, start_delays):
+        count = len(positions)
+        self.rows = [int(pos[0]) for pos in positions]
+        self.cols = [int(pos[1]) for pos in positions]
+        self.base_colors = list(base_colors)
+        self.frightened = [False] * count
+        self.eaten = [False] * count
+        self.respawn_timer = [0] * count
+        self.move_timer = [0] * count
+        self.start_delay = [int(delay) for delay in start_delays]
+        self.last_move = [(0, 0)] * count
+        self.was_in_power_mode = [False] * count
+        self.warp_delay = [0.0] * count
+        self.slowdown_timer = [0] * count
+
+    def __len__(self):
+        return len(self.rows)
+
+    def active(self):
+        """Whether each ghost is active, in ghost order."""
+        return [not eaten and timer == 0 for eaten, timer in zip(self.eaten, self.respawn_timer)]
+
+    def position(self, i):
+        return (self.rows[i], self.cols[i])
+
+    def active_positions(self):
+        """(row, col) of every active ghost, in ghost order."""
+        return [(r, c) for r, c, eaten, timer in zip(self.rows, self.cols, self.eaten, self.respawn_timer)
+                if not eaten and timer == 0]
+
+    def at(self, pos):
+        """Indices of the active ghosts standing on pos."""
+        r, c = pos[0], pos[1]
+        return [i for i, (row, col) in enumerate(zip(self.rows, self.cols))
+                if row == r and col == c and not self.eaten[i] and self.respawn_timer[i] == 0]
+
+    def color(self, i):
+        return BLUE if self.frightened[i] else self.base_colors[i]
+
+    def frighten(self):
+        """Frighten every active ghost, as a power pellet does."""
+        for i, active in enumerate(self.active()):
+            if active:
+                self.frightened[i] = True
+
+    def calm(self):
+        """End power mode: ghosts on the board stop being frightened, and none remembers it."""
+        for i, timer in enumerate(self.respawn_timer):
+            if timer == 0:
+                self.frightened[i] = False
+            self.was_in_power_mode[i] = False
+
+    def array(self, name):
+        """Field name as a NumPy array; last_move has shape (ghosts, 2)."""
+        values = np.array(getattr(self, name), dtype=self.DTYPES[name])
+        return values.reshape(len(self), 2) if name == "last_move" else values
+
+    def pack(self):
+        """Every per-ghost field, copied into a tuple, for unpack()."""
+        return tuple(tuple(getattr(self, name)) for name in self.FIELDS)
+
+    def unpack(self, data):
+        """Set every per-ghost field from pack() output of a set of the same size."""
+        for name, values in zip(self.FIELDS, data):
+            getattr(self, name)[:] = values
+
+    def stacked(self, count):
+        """count copies of this set as a GhostArrays, whose arrays gain a leading game axis."""
+        return GhostArrays({name: np.repeat(self.array(name)[None], count, axis=0) for name in self.FIELDS},
+                           self.base_colors)
+
+class GhostArrays:
+    """The fields of a GhostSet as NumPy arrays with a leading game axis, for
+    stepping many games at once (see vector_env.py)."""
+
+    FIELDS = GhostSet.FIELDS
+
+    def __init__(self, fields, base_colors):
+        for name in self.FIELDS:
+            setattr(self, name, fields[name])
+        self.base_colors = list(base_colors)
+
+    def active(self):
+        return ~self.eaten & (self.respawn_timer == 0)
@@ -0,0 +1,227 @@
+# pacman/layouts.py
+"""Maze layouts and the files they are stored in.
+
+A Layout is a maze grid (a uint8 array of the cell codes in constants) plus
+where Pac-Man and the ghosts start, where eaten ghosts respawn and which rows
+are warp tunnels, joining their two end cells. Any number of rows and
+columns is allowed.
+
+Text files hold one or more mazes, each one a header followed by its rows:
+
+    maze level1
+    pacman 1 1
+    ghost 10 15
+    ghost 10 16
+    respawn 10 15
+    warp 7
+    ##############
+    #............#
+    #.##.o##.###.#
+    ...
+
+"#" is a wall, "." a pellet, "o" a power pellet and " " an empty path;
+short rows are padded with empty path. ghost and warp lines may repeat, and
+ghosts start in the order they are listed.
+
+Binary .pmz files hold many mazes of one size, with the same number of
+ghosts and warp rows each, as a header, an int16 table of start cells and
+warp rows, and the grids back to back. load_mazes() memory-maps them, so a
+corpus of thousands of mazes opens without reading it; a grid is only paged
+in when its level starts.
+
+    python -m pacman.layouts mazes.txt mazes.pmz
+"""
+import argparse
+import struct
+import numpy as np
+from .constants import MAZES, GHOST_SPAWN, WARP_ROWS
+
+DEFAULT_GHOSTS = ((10, 15), (10, 16), (11, 15), (11, 16))
+
+CELL_CHARS = " #.o"
+CELL_CODES = {char: code for code, char in enumerate(CELL_CHARS)}
+
+class Layout:
+    """A maze grid and the start cells and warp rows that go with it."""
+
+    def __init__(self, grid, pacman=(1, 1), ghosts=DEFAULT_GHOSTS, respawn=GHOST_SPAWN, warp_rows=WARP_ROWS, name=None):
+        self.grid = grid
+        self.pacman = tuple(pacman)
+        self.ghosts = [tuple(pos) for pos in ghosts]
+        self.respawn = tuple(respawn)
+        self.warp_rows = tuple(warp_rows)
+        self.name = name
+        self._rows = None
+        where = f"the {self.rows}x{self.cols} maze" + (f" {name}" if name else "")
+        for pos in [self.pacman, self.respawn, *self.ghosts]:
+            if not (0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols):
+                raise ValueError(f"Start cell {pos} is outside {where}")
+        for row in self.warp_rows:
+            if not 0 <= row < self.rows:
+                raise ValueError(f"Warp row {row} is outside {where}")
+
+    @property
+    def rows(self):
+        return self.grid.shape[0]
+
+    @property
+    def cols(self):
+        return self.grid.shape[1]
+
+    def cells(self):
+        """A fresh list-of-lists copy of the grid."""
+        return self.grid.tolist()
+
+    def shared_rows(self):
+        """The grid as a tuple of row lists, built on first use and shared by every game on this layout.
+
+        The rows must not be written to: a game copies a row the first time
+        it eats from it (see Simulation._clear_cell()).
+        """
+        if self._rows is None:
+            self._rows = tuple(self.grid.tolist())
+        return self._rows
+
+def as_layout(maze):
+    """maze itself if it is a Layout, otherwise a Layout of the grid with the default starts."""
+    if isinstance(maze, Layout):
+        return maze
+    return Layout(np.array(maze, dtype=np.uint8))
+
+LEVELS = [Layout(np.array(maze, dtype=np.uint8), name=f"level{i + 1}") for i, maze in enumerate(MAZES)]
+
+def parse_text(text):
+    """The Layouts in a maze text file's contents."""
+    layouts = []
+    header, lines = None, []
+
+    def finish():
+        while lines and not lines[-1][1].strip():
+            lines.pop()
+        if not lines:
+            raise ValueError(f"Maze {header['name'] or 'on line ' + str(header['line'])} has no rows")
+        width = max(len(line) for _, line in lines)
+        grid = np.zeros((len(lines), width), dtype=np.uint8)
+        for r, (number, line) in enumerate(lines):
+            for c, char in enumerate(line):
+                if char not in CELL_CODES:
+                    raise ValueError(f"Line {number}: unknown maze cell {char!r}")
+                grid[r, c] = CELL_CODES[char]
+        layouts.append(Layout(grid, header["pacman"], header["ghosts"] or DEFAULT_GHOSTS, header["respawn"],
+                              header["warp_rows"], header["name"]))
+
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.rstrip("\r\n")
+        words = line.split()
+        if words and words[0] == "maze":
+            if header is not None:
+                finish()
+            header = {"line": number, "name": " ".join(words[1:]) or None, "pacman": (1, 1), "ghosts": [], "respawn": GHOST_SPAWN, "warp_rows": []}
+            lines = []
+        elif header is None:
+            if words:
+                raise ValueError(f"Line {number}: expected a 'maze' line first")
+        elif not lines and words and words[0] in ("pacman", "ghost", "respawn", "warp"):
+            try:
+                values = tuple(int(word) for word in words[1:])
+            except ValueError:
+                raise ValueError(f"Line {number}: {words[0]} takes whole numbers") from None
+            if len(values) != (1 if words[0] == "warp" else 2):
+                raise ValueError(f"Line {number}: wrong number of values for {words[0]}")
+            if words[0] == "ghost":
+                header["ghosts"].append(values)
+            elif words[0] == "warp":
+                header["warp_rows"].append(values[0])
+            else:
+                header[words[0]] = values
+        elif lines or line.strip():
+            lines.append((number, line))
+    if header is not None:
+        finish()
+    return layouts
+
+def format_text(layouts):
+    """layouts in the text maze format."""
+    blocks = []
+    for layout in layouts:
+        block = [f"maze {layout.name}" if layout.name else "maze", f"pacman {layout.pacman[0]} {layout.pacman[1]}"]
+        block += [f"ghost {r} {c}" for r, c in layout.ghosts]
+        block.append(f"respawn {layout.respawn[0]} {layout.respawn[1]}")
+        block += [f"warp {row}" for row in layout.warp_rows]
+        block += ["".join(CELL_CHARS[cell] for cell in row) for row in layout.grid.tolist()]
+        blocks.append("\n".join(block) + "\n")
+    return "\n".join(blocks)
+
+# magic, version, maze count, rows, cols, ghosts per maze, warp rows per maze
+HEADER = struct.Struct("<4sHIHHHH")
+MAGIC = b"PMZ\0"
+VERSION = 1
+
+class MazeSet:
+    """The mazes of a .pmz file, memory-mapped; indexing one gives its Layout."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, count, rows, cols, ghosts, warps = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} .pmz maze file")
+        self.path = path
+        self.ghost_count = ghosts
+        self.starts = np.memmap(path, dtype="<i2", mode="r", offset=HEADER.size, shape=(count, 4 + 2 * ghosts + warps))
+        self.grids = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size + self.starts.nbytes, shape=(count, rows, cols))
+
+    def __len__(self):
+        return len(self.grids)
+
+    def __getitem__(self, i):
+        starts = self.starts[i].tolist()
+        ghosts = 2 * self.ghost_count
+        return Layout(self.grids[i], pacman=starts[0:2], respawn=starts[2:4],
+                      ghosts=list(zip(starts[4:4 + ghosts:2], starts[5:4 + ghosts:2])),
+                      warp_rows=starts[4 + ghosts:], name=f"{self.path}[{i}]")
+
+def save_binary(path, layouts):
+    """Write layouts, which must share size, ghost count and warp row count, as a .pmz file."""
+    layouts = [as_layout(layout) for layout in layouts]
+    if not layouts:
+        raise ValueError("No mazes to save")
+    first = layouts[0]
+    shape = (first.rows, first.cols, len(first.ghosts), len(first.warp_rows))
+    for layout in layouts:
+        if (layout.rows, layout.cols, len(layout.ghosts), len(layout.warp_rows)) != shape:
+            raise ValueError(f"Maze {layout.name} does not match the size, ghosts and warp rows of {first.name}")
+    starts = np.array([[*layout.pacman, *layout.respawn, *(v for pos in layout.ghosts for v in pos), *layout.warp_rows]
+                       for layout in layouts], dtype="<i2")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(layouts), *shape))
+        f.write(starts.tobytes())
+        for layout in layouts:
+            f.write(np.ascontiguousarray(layout.grid, dtype=np.uint8).tobytes())
+
+def save_text(path, layouts):
+    with open(path, "w") as f:
+        f.write(format_text([as_layout(layout) for layout in layouts]))
+
+def load_mazes(path):
+    """The mazes in a file: a memory-mapped MazeSet for .pmz, otherwise a list of Layouts from text."""
+    if path.endswith(".pmz"):
+        return MazeSet(path)
+    with open(path) as f:
+        return parse_text(f.read())
+
+def save_mazes(path, layouts):
+    """Write layouts as .pmz or text, by path extension."""
+    if path.endswith(".pmz"):
+        save_binary(path, layouts)
+    else:
+        save_text(path, layouts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between maze text files and .pmz files.")
+    parser.add_argument("source", help='maze file to read, or "builtin" for the built-in levels')
+    parser.add_argument("dest", help="maze file to write; .pmz for binary, anything else for text")
+    args = parser.parse_args(argv)
+    save_mazes(args.dest, LEVELS if args.source == "builtin" else load_mazes(args.source))
+
+if __name__ == "__main__":
+    main()
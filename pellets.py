@@ -0,0 +1,95 @@
+# pacman/pellets.py
+
+class PelletIndex:
+    """Pellets left in a maze, kept up to date as Pac-Man eats.
+
+    Pellets are bucketed into bucket_size x bucket_size squares of the grid,
+    so nearest-pellet searches can visit buckets in rings around Pac-Man and
+    stop as soon as no further ring can hold a closer pellet. A snapshot()
+    shares the bucket sets with the index, which copies a set before it next
+    eats from it. bits and power_bits hold the same pellets as bitboards
+    (see bitboards.py).
+    """
+
+    def __init__(self, maze, bucket_size=4):
+        self.rows = len(maze)
+        self.cols = len(maze[0])
+        self.bucket_size = bucket_size
+        self.bucket_rows = -(-self.rows // bucket_size)
+        self.bucket_cols = -(-self.cols // bucket_size)
+        self.buckets = [set() for _ in range(self.bucket_rows * self.bucket_cols)]
+        self.power = set()
+        self.remaining = 0
+        self.bits = 0
+        self.power_bits = 0
+        self._shared = set()
+        self._power_shared = False
+        for r in range(self.rows):
+            for c in range(self.cols):
+                if maze[r][c] in [2, 3]:
+                    self.buckets[self._bucket(r, c)].add((r, c))
+                    self.bits |= self._bit(r, c)
+                    if maze[r][c] == 3:
+                        self.power.add((r, c))
+                        self.power_bits |= self._bit(r, c)
+                    self.remaining += 1
+
+    def _bucket(self, r, c):
+        return (r // self.bucket_size) * self.bucket_cols + c // self.bucket_size
+
+    def _bit(self, r, c):
+        return 1 << (r * (self.cols + 1) + c)
+
+    def __len__(self):
+        return self.remaining
+
+    def __contains__(self, pos):
+        return tuple(pos) in self.buckets[self._bucket(pos[0], pos[1])]
+
+    def eat(self, pos):
+        """Remove the pellet at pos, if there is one."""
+        cell = (pos[0], pos[1])
+        b = self._bucket(cell[0], cell[1])
+        bucket = self.buckets[b]
+        if cell in bucket:
+            if b in self._shared:
+                bucket = self.buckets[b] = set(bucket)
+                self._shared.discard(b)
+            bucket.remove(cell)
+            self.bits &= ~self._bit(cell[0], cell[1])
+            if cell in self.power:
+                self.power_bits &= ~self._bit(cell[0], cell[1])
+                if self._power_shared:
+                    self.power = set(self.power)
+                    self._power_shared = False
+                self.power.remove(cell)
+            self.remaining -= 1
+
+    def snapshot(self):
+        """The pellets left, as an opaque value for restore()."""
+        self._shared = set(range(len(self.buckets)))
+        self._power_shared = True
+        return tuple(self.buckets), self.power, self.remaining, self.bits, self.power_bits
+
+    def restore(self, snapshot):
+        buckets, self.power, self.remaining, self.bits, self.power_bits = snapshot
+        self.buckets = list(buckets)
+        self._shared = set(range(len(self.buckets)))
+        self._power_shared = True
+
+    def rings(self, pos):
+        """Yield (min_distance, pellets) for rings of buckets around pos.
+
+        Rings are yielded nearest first; min_distance is a lower bound on the
+        Manhattan distance from pos to any pellet in that ring or beyond.
+        """
+        size = self.bucket_size
+        pr, pc = pos[0] // size, pos[1] // size
+        for ring in range(max(self.bucket_rows, self.bucket_cols)):
+            pellets = []
+            for br in range(max(0, pr - ring), min(self.bucket_rows, pr + ring + 1)):
+                step = 1 if br in (pr - ring, pr + ring) else 2 * ring
+                for bc in range(pc - ring, pc + ring + 1, step or 1):
+                    if 0 <= bc < self.bucket_cols:
+                        pellets.extend(self.buckets[br * self.bucket_cols + bc])
+            yield (ring - 1) * size + 1 if ring else 0, pellets
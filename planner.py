@@ -0,0 +1,249 @@
+# pacman/planner.py
+from collections import OrderedDict
+from heapq import heappush, heappop
+import numpy as np
+from .constants import WARP_ROWS
+from .distances import warp_sources
+from .events import log
+
+INF = float("inf")
+# Costs are kept in integer tenths of a step so that equal keys compare equal
+STEP = 10
+WARP_COST = 1
+
+_graphs = {}
+
+class MazeGraph:
+    """The moves a_star() allows in a maze, as successor/predecessor lists.
+
+    Cells are numbered row * cols + col. Successors are (cell, row, col,
+    is_warp); grid_pred only holds grid edges, whose cost depends on the
+    penalty of the cell they lead into.
+    """
+
+    def __init__(self, maze, warp_rows=WARP_ROWS):
+        self.rows = len(maze)
+        self.cols = len(maze[0])
+        size = self.rows * self.cols
+        tunnels = warp_sources(maze, warp_rows)
+        self.is_node = [maze[r][c] != 1 for r in range(self.rows) for c in range(self.cols)]
+        for r, c in tunnels:
+            self.is_node[r * self.cols + c] = True
+        self.succ = [[] for _ in range(size)]
+        self.pred = [[] for _ in range(size)]
+        self.grid_pred = [[] for _ in range(size)]
+        for u in range(size):
+            if not self.is_node[u]:
+                continue
+            r, c = divmod(u, self.cols)
+            for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < self.rows and 0 <= nc < self.cols and maze[nr][nc] != 1:
+                    v = nr * self.cols + nc
+                    self.succ[u].append((v, nr, nc, False))
+                    self.pred[v].append(u)
+                    self.grid_pred[v].append(u)
+        for (er, ec), sources in tunnels.items():
+            end = er * self.cols + ec
+            for r, c in sources:
+                u = r * self.cols + c
+                self.succ[u].append((end, er, ec, True))
+                self.pred[end].append(u)
+        # For the heuristic: the cost of the fewest grid steps from each cell
+        # to a cell that warps to each tunnel end.
+        self.warp_ends = [(end, self._steps_to(sources)) for end, sources in tunnels.items() if sources]
+
+    def _steps_to(self, cells):
+        return [STEP * min(abs(r - sr) + abs(c - sc) for sr, sc in cells) for r in range(self.rows) for c in range(self.cols)]
+
+def maze_graph(maze, warp_rows=WARP_ROWS):
+    """Return the MazeGraph for this maze's walls and warp rows, building it on first use."""
+    key = (len(maze[0]), tuple(warp_rows), bytes(cell == 1 for row in maze for cell in row))
+    graph = _graphs.get(key)
+    if graph is None:
+        graph = _graphs[key] = MazeGraph(maze, warp_rows)
+    return graph
+
+class Planner:
+    """Incremental drop-in for a_star() (D* Lite), kept alive across ticks.
+
+    The search runs backwards from the goal, so when Pac-Man moves or the
+    ghost penalties change only the part of the search tree whose edges got
+    cheaper or dearer is repaired; a new goal starts a fresh search. Edges and
+    costs are the ones a_star() uses: a grid step costs 1 plus the danger
+    penalty of the cell entered (rounded to a tenth), and the warp shortcuts
+    cost 0.1. Finished paths are also kept in an LRU cache keyed on
+    (start, goal, danger state).
+    """
+
+    def __init__(self, maze, cache_size=256, warp_rows=WARP_ROWS):
+        graph = maze_graph(maze, warp_rows)
+        self.rows, self.cols = graph.rows, graph.cols
+        self.is_node, self.succ, self.pred, self.grid_pred = graph.is_node, graph.succ, graph.pred, graph.grid_pred
+        self._warp_ends = graph.warp_ends
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.expanded = 0
+        self._zeros = np.zeros((self.rows, self.cols))
+        self._zero_rows = [[STEP] * self.cols for _ in range(self.rows)]
+        self.goal = None
+        self.start = None
+
+    def _via_warp(self, u):
+        """(tunnel end, cheapest cost of arriving there by warping) from cell u."""
+        costs = [steps[u] + WARP_COST for _, steps in self._warp_ends]
+        # Warping more than once can be the cheaper way to reach a far end
+        for _ in range(len(costs) - 1):
+            for i, (_, steps) in enumerate(self._warp_ends):
+                for j, ((r, c), _) in enumerate(self._warp_ends):
+                    if j != i and costs[j] + steps[r * self.cols + c] + WARP_COST < costs[i]:
+                        costs[i] = costs[j] + steps[r * self.cols + c] + WARP_COST
+        return [(end, cost) for (end, _), cost in zip(self._warp_ends, costs)]
+
+    def _h(self, u):
+        """Lower bound on the path cost from the start to cell u.
+
+        It is the exact distance in a relaxed maze with no walls and no ghost
+        penalties but the same warp edges, which keeps it consistent.
+        """
+        r, c = divmod(u, self.cols)
+        sr, sc = self._start_pos
+        h = STEP * (abs(r - sr) + abs(c - sc))
+        for (er, ec), cost in self._start_via:
+            via = cost + STEP * (abs(r - er) + abs(c - ec))
+            if via < h:
+                h = via
+        return h
+
+    def _key(self, u):
+        g = self.g.get(u, INF)
+        rhs = self.rhs.get(u, INF)
+        if rhs < g:
+            g = rhs
+        return (g + self._h(u) + self.km, g)
+
+    def _update_vertex(self, u):
+        g, rhs = self.g, self.rhs
+        if u != self.goal:
+            best = INF
+            penalties = self._penalty_rows
+            for v, r, c, warp in self.succ[u]:
+                cost = (WARP_COST if warp else penalties[r][c]) + g.get(v, INF)
+                if cost < best:
+                    best = cost
+            rhs[u] = best
+        self.open.pop(u, None)
+        if g.get(u, INF) != rhs.get(u, INF):
+            key = self._key(u)
+            self.open[u] = key
+            heappush(self.heap, (key[0], key[1], u))
+
+    def _compute_shortest_path(self):
+        start, heap, g, rhs, open_keys = self.start, self.heap, self.g, self.rhs, self.open
+        while heap:
+            k1, k2, u = heap[0]
+            if open_keys.get(u) != (k1, k2):
+                heappop(heap)
+                continue
+            g_start, rhs_start = g.get(start, INF), rhs.get(start, INF)
+            best = min(g_start, rhs_start)
+            if not ((k1, k2) < (best + self.km, best) or rhs_start != g_start):
+                break
+            heappop(heap)
+            self.expanded += 1
+            new_key = self._key(u)
+            if (k1, k2) < new_key:
+                open_keys[u] = new_key
+                heappush(heap, (new_key[0], new_key[1], u))
+            elif g.get(u, INF) > rhs[u]:
+                g[u] = rhs[u]
+                del open_keys[u]
+                for p in self.pred[u]:
+                    self._update_vertex(p)
+            else:
+                g[u] = INF
+                del open_keys[u]
+                for p in self.pred[u]:
+                    self._update_vertex(p)
+                self._update_vertex(u)
+
+    def _set_start(self, start):
+        self.start = start
+        self._start_pos = divmod(start, self.cols)
+        self._start_via = self._via_warp(start)
+
+    def plan(self, start, goal, danger=None, power_mode=False):
+        """Return a path [start, ..., goal] like a_star(), or None."""
+        if power_mode or danger is None:
+            penalties, signature = self._zeros, None
+        else:
+            penalties, signature = danger.cost, danger.signature
+        cache_key = (start[0], start[1], goal[0], goal[1], signature)
+        path = self.cache.get(cache_key)
+        if path is not None:
+            self.cache.move_to_end(cache_key)
+            return list(path)
+        path = self._plan(start, goal, penalties)
+        if path is None:
+            log.debug("No path from %s to %s", tuple(start), tuple(goal))
+            return None
+        self.cache[cache_key] = path
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return list(path)
+
+    def _plan(self, start, goal, penalties):
+        s = start[0] * self.cols + start[1]
+        t = goal[0] * self.cols + goal[1]
+        if not (self.is_node[s] and self.is_node[t]):
+            return None
+        if s == t:
+            return [(start[0], start[1])]
+        if t != self.goal:
+            # New goal: start a fresh search tree rooted at it
+            self._set_penalties(penalties)
+            self._set_start(s)
+            self.goal = t
+            self.g, self.rhs = {}, {t: 0}
+            self.km = 0
+            self.open, self.heap = {}, []
+            self._update_vertex(t)
+        else:
+            if s != self.start:
+                # The start moved: raise every key left in the queue by at most
+                # the heuristic distance it moved, instead of re-keying them.
+                self.km += self._h(s)
+                self._set_start(s)
+            if penalties is not self.penalties:
+                changed = np.flatnonzero(penalties != self.penalties)
+                self._set_penalties(penalties)
+                for v in changed.tolist():
+                    for u in self.grid_pred[v]:
+                        self._update_vertex(u)
+        self._compute_shortest_path()
+        return self._extract_path()
+
+    def _set_penalties(self, penalties):
+        self.penalties = penalties
+        if penalties is self._zeros:
+            self._penalty_rows = self._zero_rows
+        else:
+            # Step cost into each cell, in tenths
+            self._penalty_rows = (STEP + np.rint(penalties * STEP)).astype(int).tolist()
+
+    def _extract_path(self):
+        u, g, penalties = self.start, self.g, self._penalty_rows
+        if min(g.get(u, INF), self.rhs.get(u, INF)) == INF:
+            return None
+        path = [divmod(u, self.cols)]
+        while u != self.goal:
+            best, best_cost = None, INF
+            for v, r, c, warp in self.succ[u]:
+                cost = (WARP_COST if warp else penalties[r][c]) + g.get(v, INF)
+                if cost < best_cost:
+                    best, best_cost = v, cost
+            if best is None or len(path) > len(self.succ):
+                return None
+            u = best
+            path.append(divmod(u, self.cols))
+        return path
@@ -0,0 +1,131 @@
+# pacman/profiling.py
+"""Per-tick phase timing for Simulation, without an external profiler.
+
+    python -m pacman.profiling --seed 0 --ticks 3000 --trace trace.json
+    python -m pacman.profiling --budget-ms 20 --agent-workers 4 --ticks 300
+
+Simulation(profiler=TickProfiler()) marks the end of each phase of a tick;
+the time since the previous mark is charged to that phase. Per-tick counters
+(nodes the planner expanded, walking distance to the nearest ghost, search
+iterations and the share of its time budget a lookahead agent used) ride
+along, so a spike in one phase can be matched with what caused it. The last
+window ticks feed summary(); with trace=True every tick is also kept as Chrome
+trace events (chrome://tracing or https://ui.perfetto.dev) for write_trace().
+"""
+import argparse
+import json
+import math
+import sys
+from collections import deque
+from time import perf_counter_ns
+import numpy as np
+
+PHASES = ("agent", "safety", "target", "planning", "pacman_move", "collision", "pellets", "ghosts", "render")
+
+class TickProfiler:
+    """Rolling per-phase tick timings, and optionally a Chrome trace."""
+
+    def __init__(self, window=1000, trace=False):
+        self.window = window
+        self.phases = {phase: deque(maxlen=window) for phase in PHASES}
+        self.counters = {}
+        self.trace = [] if trace else None
+        self.ticks = 0
+        self._tick = None
+
+    def begin_tick(self, tick):
+        self._tick = tick
+        self._spent = dict.fromkeys(PHASES, 0)
+        self._counts = {}
+        self._last = perf_counter_ns()
+
+    def mark(self, phase):
+        """Charge the time since the last mark (or the start of the tick) to phase."""
+        now = perf_counter_ns()
+        self._spent[phase] += now - self._last
+        if self.trace is not None:
+            self.trace.append({"name": phase, "ph": "X", "ts": self._last / 1000, "dur": (now - self._last) / 1000,
+                               "pid": 0, "tid": 0, "args": {"tick": self._tick}})
+        self._last = now
+
+    def count(self, name, value):
+        """Record a per-tick counter, e.g. nodes expanded by the planner."""
+        self._counts[name] = self._counts.get(name, 0) + value
+
+    def end_tick(self):
+        for phase, spent in self._spent.items():
+            self.phases[phase].append(spent)
+        for name, value in self._counts.items():
+            if name not in self.counters:
+                self.counters[name] = deque(maxlen=self.window)
+            self.counters[name].append(value)
+        if self.trace is not None and self._counts:
+            self.trace.append({"name": "counters", "ph": "C", "ts": self._last / 1000, "pid": 0,
+                               "args": {name: value for name, value in self._counts.items() if math.isfinite(value)}})
+        self.ticks += 1
+
+    def summary(self):
+        """{phase: {mean_us, p99_us, max_us, share}} and {counter: {mean, max}} over the window."""
+        totals = {phase: np.array(samples) / 1000 for phase, samples in self.phases.items() if samples}
+        tick_total = sum(samples.sum() for samples in totals.values()) or 1
+        phases = {
+            phase: {
+                "mean_us": round(float(samples.mean()), 2),
+                "p99_us": round(float(np.percentile(samples, 99)), 2),
+                "max_us": round(float(samples.max()), 2),
+                "share": round(float(samples.sum() / tick_total), 4),
+            }
+            for phase, samples in totals.items()
+        }
+        counters = {}
+        for name, values in self.counters.items():
+            values = np.array([value for value in values if math.isfinite(value)])
+            if len(values):
+                counters[name] = {"mean": round(float(values.mean()), 2), "max": float(values.max())}
+        return {"ticks": min(self.ticks, self.window), "phases": phases, "counters": counters}
+
+    def format_summary(self):
+        summary = self.summary()
+        lines = [f"last {summary['ticks']} ticks", f"{'phase':<12} {'mean us':>10} {'p99 us':>10} {'max us':>10} {'share':>7}"]
+        for phase, stats in summary["phases"].items():
+            lines.append(f"{phase:<12} {stats['mean_us']:>10.1f} {stats['p99_us']:>10.1f} {stats['max_us']:>10.1f} {stats['share']:>7.1%}")
+        for name, stats in summary["counters"].items():
+            lines.append(f"{name}: mean {stats['mean']:.1f}, max {stats['max']:g}")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        """Write the recorded ticks as Chrome trace JSON."""
+        if self.trace is None:
+            raise ValueError("TickProfiler was created without trace=True")
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace, "displayTimeUnit": "ms"}, f)
+
+def main(argv=None):
+    from .agents import LookaheadAgent
+    from .simulation import Simulation
+
+    parser = argparse.ArgumentParser(description="Profile the phases of a headless Pac-Man episode.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--level", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=3000, help="stop the episode after this many ticks")
+    parser.add_argument("--window", type=int, default=1000, help="ticks in the rolling summary")
+    parser.add_argument("--trace", default=None, help="write a Chrome trace JSON file")
+    parser.add_argument("--budget-ms", type=float, default=None, metavar="MS",
+                        help="play Pac-Man by tree search with MS milliseconds per move")
+    parser.add_argument("--agent-workers", type=int, default=0, help="processes the tree search runs on")
+    args = parser.parse_args(argv)
+
+    profiler = TickProfiler(window=args.window, trace=args.trace is not None)
+    agent = None if args.budget_ms is None else LookaheadAgent(args.budget_ms, workers=args.agent_workers, seed=args.seed)
+    sim = Simulation(args.level, seed=args.seed, profiler=profiler, agent=agent)
+    try:
+        sim.run(args.ticks)
+    finally:
+        if agent is not None:
+            agent.close()
+    print(profiler.format_summary(), file=sys.stderr)
+    if args.trace:
+        profiler.write_trace(args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,212 @@
-# pacman/rendering.py
-import pygame
-import math
-from .constants import WIDTH, HEIGHT, CELL_SIZE, OFFSET_X, OFFSET_Y, BLACK, YELLOW, RED, WHITE, BLUE, PURPLE, ROWS, COLS, WARP_ROW
-
-def draw_maze(screen, maze):
-    for row in range(ROWS):
-        for col in range(COLS):
-            x = OFFSET_X + col * CELL_SIZE
-            y = OFFSET_Y + row * CELL_SIZE
-            if maze[row][col] == 1:
-                pygame.draw.rect(screen, BLUE, (x, y, CELL_SIZE, CELL_SIZE))
-            elif maze[row][col] == 2:
-                pygame.draw.circle(screen, WHITE, (x + CELL_SIZE // 2, y + CELL_SIZE // 2), 3)
-            elif maze[row][col] == 3:
-                pygame.draw.circle(screen, WHITE, (x + CELL_SIZE // 2, y + CELL_SIZE // 2), 8)
-            if row == WARP_ROW and col in [0, COLS-1]:
-                pygame.draw.rect(screen, PURPLE, (x, y, CELL_SIZE, CELL_SIZE))
-
-def draw_pacman(screen, pacman_pos, direction, mouth_open, mouth_timer):
-    mouth_timer += 1
-    if mouth_timer % 5 == 0:
-        mouth_open = not mouth_open
-    center_x = OFFSET_X + pacman_pos[1] * CELL_SIZE + CELL_SIZE // 2
-    center_y = OFFSET_Y + pacman_pos[0] * CELL_SIZE + CELL_SIZE // 2
-    radius = CELL_SIZE // 2
-    if mouth_open:
-        start_angle = {"RIGHT": 45, "LEFT": 225, "UP": 135, "DOWN": 315}[direction]
-        end_angle = start_angle - 90 if direction in ["RIGHT", "DOWN"] else start_angle + 90
-        pygame.draw.arc(screen, YELLOW, (center_x - radius, center_y - radius, radius * 2, radius * 2), 
-                        math.radians(start_angle), math.radians(end_angle), radius)
-        pygame.draw.circle(screen, YELLOW, (center_x, center_y), radius - 2)
-    else:
-        pygame.draw.circle(screen, YELLOW, (center_x, center_y), radius)
-    return mouth_open, mouth_timer
-
-def draw_ghosts(screen, ghosts):
-    for ghost in ghosts:
-        if not ghost["eaten"] and ghost["respawn_timer"] == 0:
-            pygame.draw.circle(screen, ghost["color"], 
-                              (OFFSET_X + ghost["pos"][1] * CELL_SIZE + CELL_SIZE // 2, 
-                               OFFSET_Y + ghost["pos"][0] * CELL_SIZE + CELL_SIZE // 2), 
-                              CELL_SIZE // 2)
-
-def draw_game_over_screen(screen, score):
-    screen.fill(BLACK)
-    font = pygame.font.SysFont(None, 72)
-    game_over_text = font.render("Game Over", True, RED)
-    game_over_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 3))
-    screen.blit(game_over_text, game_over_rect)
-    font = pygame.font.SysFont(None, 48)
-    score_text = font.render(f"Final Score: {score}", True, WHITE)
-    score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-    screen.blit(score_text, score_rect)
-
-def draw_win_screen(screen, score):
-    screen.fill(BLACK)
-    font = pygame.font.SysFont(None, 72)
-    win_text = font.render("You Win!", True, YELLOW)
-    win_rect = win_text.get_rect(center=(WIDTH // 2, HEIGHT // 3))
-    screen.blit(win_text, win_rect)
-    font = pygame.font.SysFont(None, 48)
-    score_text = font.render(f"Final Score: {score}", True, WHITE)
-    score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-    screen.blit(score_text, score_rect)
-
-def draw_hud(screen, score, current_level):
-    font = pygame.font.SysFont(None, 36)
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    level_text = font.render(f"Level: {current_level + 1}", True, WHITE)
-    screen.blit(score_text, (10, 10))
-    screen.blit(level_text, (WIDTH - 100, 10))
\ No newline at end of file
+# pacman/rendering.py
+import pygame
+import math
+from collections import OrderedDict
+from .constants import WIDTH, HEIGHT, CELL_SIZE, OFFSET_X, OFFSET_Y, BLACK, YELLOW, RED, WHITE, BLUE, PURPLE, WARP_ROWS
+
+class TextCache:
+    """Fonts and rendered text, kept between frames.
+
+    A font is loaded once per size (sizes are loaded up front), and each
+    rendered (text, size, color) surface is reused until it falls out of an
+    LRU of max_surfaces entries -- e.g. the score text until the score changes.
+    """
+
+    def __init__(self, sizes=(36, 48, 72), max_surfaces=32):
+        self.fonts = {size: pygame.font.SysFont(None, size) for size in sizes}
+        self.max_surfaces = max_surfaces
+        self.surfaces = OrderedDict()
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.SysFont(None, size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = self.surfaces[key] = self.font(size).render(text, True, color)
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surface
+
+_text_cache = None
+
+def text_cache():
+    """The TextCache shared by the drawing functions, created on first use."""
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = TextCache()
+    return _text_cache
+
+# (offset_x, offset_y, cell_size) of the board on the screen, for the built-in 16 x 30 mazes
+DEFAULT_GEOMETRY = (OFFSET_X, OFFSET_Y, CELL_SIZE)
+# Room left free above and below the board for the HUD
+HUD_HEIGHT = 40
+
+def board_geometry(rows, cols, width=WIDTH, height=HEIGHT):
+    """(offset_x, offset_y, cell_size) that centres a rows x cols maze on a width x height screen.
+
+    Cells are CELL_SIZE pixels, or smaller when the maze would not fit
+    otherwise, with HUD_HEIGHT kept clear above and below it.
+    """
+    cell_size = max(1, min(CELL_SIZE, width // cols, (height - 2 * HUD_HEIGHT) // rows))
+    return (width - cols * cell_size) // 2, (height - rows * cell_size) // 2, cell_size
+
+def cell_rect(pos, geometry=DEFAULT_GEOMETRY):
+    offset_x, offset_y, cell_size = geometry
+    return pygame.Rect(offset_x + pos[1] * cell_size, offset_y + pos[0] * cell_size, cell_size, cell_size)
+
+def render_maze(maze, pellets=True, warp_rows=WARP_ROWS, geometry=DEFAULT_GEOMETRY, size=(WIDTH, HEIGHT)):
+    """The maze on a black Surface of the given size, optionally without its pellets."""
+    surface = pygame.Surface(size)
+    surface.fill(BLACK)
+    if not pellets:
+        maze = [[1 if cell == 1 else 0 for cell in row] for row in maze]
+    draw_maze(surface, maze, warp_rows, geometry)
+    return surface
+
+def draw_maze(screen, maze, warp_rows=WARP_ROWS, geometry=DEFAULT_GEOMETRY):
+    offset_x, offset_y, cell_size = geometry
+    half = cell_size // 2
+    # Pellet sizes as drawn on the default 20-pixel cells
+    pellet_radius, power_radius = max(1, cell_size * 3 // 20), max(1, cell_size * 8 // 20)
+    cols = len(maze[0])
+    for row in range(len(maze)):
+        for col in range(cols):
+            x = offset_x + col * cell_size
+            y = offset_y + row * cell_size
+            if maze[row][col] == 1:
+                pygame.draw.rect(screen, BLUE, (x, y, cell_size, cell_size))
+            elif maze[row][col] == 2:
+                pygame.draw.circle(screen, WHITE, (x + half, y + half), pellet_radius)
+            elif maze[row][col] == 3:
+                pygame.draw.circle(screen, WHITE, (x + half, y + half), power_radius)
+            if row in warp_rows and col in [0, cols-1]:
+                pygame.draw.rect(screen, PURPLE, (x, y, cell_size, cell_size))
+
+def draw_pacman(screen, pacman_pos, direction, mouth_open, mouth_timer, geometry=DEFAULT_GEOMETRY):
+    offset_x, offset_y, cell_size = geometry
+    mouth_timer += 1
+    if mouth_timer % 5 == 0:
+        mouth_open = not mouth_open
+    center_x = offset_x + pacman_pos[1] * cell_size + cell_size // 2
+    center_y = offset_y + pacman_pos[0] * cell_size + cell_size // 2
+    radius = max(1, cell_size // 2)
+    if mouth_open:
+        start_angle = {"RIGHT": 45, "LEFT": 225, "UP": 135, "DOWN": 315}[direction]
+        end_angle = start_angle - 90 if direction in ["RIGHT", "DOWN"] else start_angle + 90
+        pygame.draw.arc(screen, YELLOW, (center_x - radius, center_y - radius, radius * 2, radius * 2), 
+                        math.radians(start_angle), math.radians(end_angle), radius)
+        pygame.draw.circle(screen, YELLOW, (center_x, center_y), max(1, radius - 2))
+    else:
+        pygame.draw.circle(screen, YELLOW, (center_x, center_y), radius)
+    return mouth_open, mouth_timer
+
+def draw_ghosts(screen, ghosts, geometry=DEFAULT_GEOMETRY):
+    offset_x, offset_y, cell_size = geometry
+    active = ghosts.active()
+    for i in range(len(ghosts)):
+        if active[i]:
+            row, col = ghosts.position(i)
+            pygame.draw.circle(screen, ghosts.color(i), 
+                              (offset_x + col * cell_size + cell_size // 2, 
+                               offset_y + row * cell_size + cell_size // 2), 
+                              max(1, cell_size // 2))
+
+def draw_game_over_screen(screen, score):
+    screen.fill(BLACK)
+    texts = text_cache()
+    game_over_text = texts.render("Game Over", 72, RED)
+    game_over_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 3))
+    screen.blit(game_over_text, game_over_rect)
+    score_text = texts.render(f"Final Score: {score}", 48, WHITE)
+    score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+    screen.blit(score_text, score_rect)
+
+def draw_win_screen(screen, score):
+    screen.fill(BLACK)
+    texts = text_cache()
+    win_text = texts.render("You Win!", 72, YELLOW)
+    win_rect = win_text.get_rect(center=(WIDTH // 2, HEIGHT // 3))
+    screen.blit(win_text, win_rect)
+    score_text = texts.render(f"Final Score: {score}", 48, WHITE)
+    score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+    screen.blit(score_text, score_rect)
+
+def draw_hud(screen, score, current_level):
+    texts = text_cache()
+    score_text = texts.render(f"Score: {score}", 36, WHITE)
+    level_text = texts.render(f"Level: {current_level + 1}", 36, WHITE)
+    return [screen.blit(score_text, (10, 10)), screen.blit(level_text, (screen.get_width() - 100, 10))]
+
+class SpectatorView:
+    """Simulation observer that draws every tick to a pygame window.
+
+    The maze is rendered once per level onto a cached board Surface,
+    centred and scaled to fit the screen (see board_geometry()), and
+    pellets are erased from it as they are eaten. Each frame then only
+    restores the cells under last frame's Pac-Man and ghosts, draws them
+    again (and the HUD, when the score or level changed), and passes just
+    those rects to pygame.display.update().
+    """
+
+    def __init__(self, screen, clock=None, fps=15):
+        self.screen = screen
+        self.clock = clock
+        self.fps = fps
+        self.mouth_open = True
+        self.mouth_timer = 0
+        self.maze = None
+        self.geometry = DEFAULT_GEOMETRY
+        self.sprite_rects = []
+        self.hud = None
+        self.hud_rects = []
+
+    def _new_level(self, maze, layout):
+        self.maze = maze
+        size = self.screen.get_size()
+        self.geometry = board_geometry(layout.rows, layout.cols, *size)
+        self.background = render_maze(maze, False, layout.warp_rows, self.geometry, size)
+        self.board = render_maze(maze, True, layout.warp_rows, self.geometry, size)
+        self.screen.blit(self.board, (0, 0))
+        self.sprite_rects = []
+        self.hud = None
+        self.hud_rects = []
+
+    def __call__(self, sim):
+        screen = self.screen
+        new_level = sim.maze is not self.maze
+        if new_level:
+            self._new_level(sim.maze, sim.layout)
+        board, geometry = self.board, self.geometry
+        # Pac-Man is the only one who eats, so only his cell can have lost a pellet
+        row, col = sim.pacman_pos
+        if sim.maze[row][col] not in (2, 3):
+            rect = cell_rect(sim.pacman_pos, geometry)
+            board.blit(self.background, rect, rect)
+        changed = self.sprite_rects
+        for rect in changed:
+            screen.blit(board, rect, rect)
+        self.mouth_open, self.mouth_timer = draw_pacman(screen, sim.pacman_pos, sim.direction, self.mouth_open, self.mouth_timer,
+                                                        geometry)
+        draw_ghosts(screen, sim.ghosts, geometry)
+        self.sprite_rects = [cell_rect(sim.pacman_pos, geometry)] + [cell_rect(pos, geometry) for pos in sim.ghosts.active_positions()]
+        changed = changed + self.sprite_rects
+        if self.hud != (sim.score, sim.level):
+            for rect in self.hud_rects:
+                screen.blit(board, rect, rect)
+            changed += self.hud_rects
+            self.hud_rects = draw_hud(screen, sim.score, sim.level)
+            changed += self.hud_rects
+            self.hud = (sim.score, sim.level)
+        if new_level:
+            pygame.display.flip()
+        else:
+            pygame.display.update(changed)
+        if self.clock:
+            self.clock.tick(self.fps)
@@ -0,0 +1,256 @@
+# pacman/replay.py
+"""Recording episodes and playing them back.
+
+    python -m pacman.replay seed-7.pmr                 # watch it at 15 fps
+    python -m pacman.replay seed-7.pmr --fps 60 --start 900
+    python -m pacman.replay seed-7.pmr --headless      # check it still replays
+
+A game is deterministic given its seed and Pac-Man's moves: the ghosts draw
+from the simulation's own random.Random(seed). A replay therefore stores the
+seed, the starting level, the GameConfig and each tick's Pac-Man action, and
+plays back by stepping a fresh Simulation with those actions. The ghosts' moves are stored
+as well, one 4-bit code per ghost per tick, and checked during playback, so
+a replay that no longer matches the game code fails loudly at the tick where
+it diverged instead of showing a different game. The tick stream is
+zlib-compressed to under a byte per tick, about 1.5 KiB for a full game.
+
+ReplayPlayer keeps a keyframe of the game every keyframe_interval ticks it
+plays through, so seek() jumps back to the nearest one and replays forward
+from there.
+"""
+import argparse
+import json
+import struct
+import sys
+import zlib
+from .config import DEFAULT_CONFIG, GameConfig
+from .layouts import LEVELS, as_layout, load_mazes
+from .simulation import Simulation, episode_result
+
+# Ghost move codes: a step in each direction, a warp to the other end of a
+# tunnel, or any other jump (respawn, a new level)
+STAYED, MOVED_UP, MOVED_DOWN, MOVED_LEFT, MOVED_RIGHT, WARPED, JUMPED = range(7)
+STEP_CODES = {(0, 0): STAYED, (-1, 0): MOVED_UP, (1, 0): MOVED_DOWN, (0, -1): MOVED_LEFT, (0, 1): MOVED_RIGHT}
+
+STATES = ("playing", "game_over", "win")
+
+# magic, version, seed, level, ticks, final score, final state, crc32 of the first level's grid
+HEADER = struct.Struct("<4sHqHIiBI")
+# Then the GameConfig, as the byte length of its JSON and the JSON itself
+CONFIG_SIZE = struct.Struct("<H")
+MAGIC = b"PMR\0"
+VERSION = 2
+# Version 1 replays have no config: they were played with the defaults
+VERSIONS = (1, VERSION)
+# A tick's first byte is Pac-Man's action; NEW_COUNT in it means a byte with
+# the number of ghosts follows (first tick, or a level with more or fewer).
+NEW_COUNT = 0x80
+
+def ghost_moves(rows, cols, ghosts, maze_cols):
+    """The move code of every ghost, from where they were (rows, cols) to where they are."""
+    if len(rows) != len(ghosts):
+        return bytes([JUMPED] * len(ghosts))
+    codes = []
+    for r0, c0, r1, c1 in zip(rows, cols, ghosts.rows, ghosts.cols):
+        code = STEP_CODES.get((r1 - r0, c1 - c0))
+        if code is None:
+            code = WARPED if r1 == r0 and abs(c1 - c0) == maze_cols - 1 else JUMPED
+        codes.append(code)
+    return bytes(codes)
+
+def grid_crc(layout):
+    return zlib.crc32(layout.grid.tobytes())
+
+class Replay:
+    """A recorded episode: its seed, starting level and config, and each tick's moves."""
+
+    def __init__(self, seed, level, actions, ghost_moves, score=0, state="playing", maze_crc=0, config=DEFAULT_CONFIG):
+        self.seed = seed
+        self.level = level
+        self.actions = bytes(actions)
+        self.ghost_moves = list(ghost_moves)
+        self.score = score
+        self.state = state
+        self.maze_crc = maze_crc
+        self.config = config
+
+    def __len__(self):
+        return len(self.actions)
+
+    def to_bytes(self):
+        body = bytearray()
+        count = None
+        for action, moves in zip(self.actions, self.ghost_moves):
+            if len(moves) != count:
+                count = len(moves)
+                body += bytes([action | NEW_COUNT, count])
+            else:
+                body.append(action)
+            packed = moves + b"\0" if len(moves) % 2 else moves
+            body += bytes(packed[i] << 4 | packed[i + 1] for i in range(0, len(packed), 2))
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.level, len(self), self.score, STATES.index(self.state), self.maze_crc)
+        config = json.dumps(self.config.as_dict(), sort_keys=True).encode()
+        return header + CONFIG_SIZE.pack(len(config)) + config + zlib.compress(bytes(body), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, level, ticks, score, state, maze_crc = HEADER.unpack_from(data)
+        if magic != MAGIC or version not in VERSIONS:
+            raise ValueError(f"Not a version {' or '.join(map(str, VERSIONS))} Pac-Man replay")
+        start, config = HEADER.size, DEFAULT_CONFIG
+        if version > 1:
+            size, = CONFIG_SIZE.unpack_from(data, start)
+            start += CONFIG_SIZE.size
+            config = GameConfig(**json.loads(data[start:start + size]))
+            start += size
+        body = zlib.decompress(data[start:])
+        actions, moves = bytearray(), []
+        i, count = 0, 0
+        for _ in range(ticks):
+            action = body[i]
+            i += 1
+            if action & NEW_COUNT:
+                count = body[i]
+                i += 1
+            packed = body[i:i + (count + 1) // 2]
+            i += len(packed)
+            actions.append(action & ~NEW_COUNT)
+            moves.append(bytes(code for byte in packed for code in (byte >> 4, byte & 0xF))[:count])
+        return cls(seed, level, actions, moves, score, STATES[state], maze_crc, config)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+def load_replay(path):
+    with open(path, "rb") as f:
+        return Replay.from_bytes(f.read())
+
+class ReplayRecorder:
+    """Simulation observer that records the episode it watches, from its first tick.
+
+        recorder = ReplayRecorder(sim)
+        sim.run()
+        recorder.save("episode.pmr")
+    """
+
+    def __init__(self, sim):
+        if sim.seed is None:
+            raise ValueError("Only seeded simulations can be replayed")
+        if sim.ticks:
+            raise ValueError("Recording has to start before the first tick")
+        self.sim = sim
+        self.level = sim.level
+        self.maze_crc = grid_crc(sim.layout)
+        self.actions = bytearray()
+        self.ghost_moves = []
+        self._rows, self._cols = list(sim.ghosts.rows), list(sim.ghosts.cols)
+        sim.add_observer(self)
+
+    def __call__(self, sim):
+        self.actions.append(sim.action)
+        self.ghost_moves.append(ghost_moves(self._rows, self._cols, sim.ghosts, sim.layout.cols))
+        self._rows, self._cols = list(sim.ghosts.rows), list(sim.ghosts.cols)
+
+    def replay(self):
+        sim = self.sim
+        return Replay(sim.seed, self.level, self.actions, self.ghost_moves, sim.score, sim.state, self.maze_crc, sim.config)
+
+    def save(self, path):
+        self.replay().save(path)
+
+class ReplayPlayer:
+    """Plays a Replay back through a Simulation, checking the ghosts' moves as it goes."""
+
+    def __init__(self, replay, mazes=LEVELS, observers=None, keyframe_interval=256):
+        if grid_crc(as_layout(mazes[replay.level])) != replay.maze_crc:
+            raise ValueError("The replay was recorded on a different maze")
+        self.replay = replay
+        self.sim = Simulation(replay.level, observers=observers, seed=replay.seed, mazes=mazes, config=replay.config)
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = {0: self.sim.snapshot()}
+        self._rows, self._cols = list(self.sim.ghosts.rows), list(self.sim.ghosts.cols)
+
+    @property
+    def tick(self):
+        return self.sim.ticks
+
+    @property
+    def done(self):
+        return self.sim.ticks >= len(self.replay) or self.sim.done
+
+    def step(self):
+        """Play the next recorded tick; raises RuntimeError if the game no longer matches it."""
+        sim, tick = self.sim, self.sim.ticks
+        sim.step(self.replay.actions[tick])
+        moves = ghost_moves(self._rows, self._cols, sim.ghosts, sim.layout.cols)
+        if moves != self.replay.ghost_moves[tick]:
+            raise RuntimeError(f"Replay diverged at tick {tick}: ghost moves {list(moves)}, "
+                               f"recorded {list(self.replay.ghost_moves[tick])}")
+        self._rows, self._cols = list(sim.ghosts.rows), list(sim.ghosts.cols)
+        if sim.ticks % self.keyframe_interval == 0 and sim.ticks not in self.keyframes:
+            self.keyframes[sim.ticks] = sim.snapshot()
+        if sim.ticks == len(self.replay) and (sim.score, sim.state) != (self.replay.score, self.replay.state):
+            raise RuntimeError(f"Replay ended {sim.state} with {sim.score}, recorded {self.replay.state} with {self.replay.score}")
+
+    def run(self, until=None):
+        """Play up to tick until, or to the end; returns the simulation."""
+        until = len(self.replay) if until is None else min(until, len(self.replay))
+        while self.sim.ticks < until and not self.done:
+            self.step()
+        return self.sim
+
+    def seek(self, tick):
+        """Move to tick, from the nearest keyframe at or before it when going back or far ahead."""
+        tick = max(0, min(tick, len(self.replay)))
+        start = max(t for t in self.keyframes if t <= tick)
+        if tick < self.sim.ticks or start > self.sim.ticks:
+            self.sim.restore(self.keyframes[start])
+            self._rows, self._cols = list(self.sim.ghosts.rows), list(self.sim.ghosts.cols)
+        # Observers (e.g. the window) only need to see where playback lands
+        observers, self.sim.observers = self.sim.observers, []
+        try:
+            self.run(tick)
+        finally:
+            self.sim.observers = observers
+        return self.sim
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a recorded Pac-Man episode.")
+    parser.add_argument("replay", help="replay file (.pmr)")
+    parser.add_argument("--mazes", default=None, metavar="FILE", help="maze file the episode was played on")
+    parser.add_argument("--headless", action="store_true", help="check the replay at full speed without a window")
+    parser.add_argument("--fps", type=int, default=15, help="playback speed in the window; 0 for as fast as possible")
+    parser.add_argument("--start", type=int, default=0, help="tick to start watching from")
+    args = parser.parse_args(argv)
+
+    replay = load_replay(args.replay)
+    mazes = load_mazes(args.mazes) if args.mazes else LEVELS
+    if args.headless:
+        player = ReplayPlayer(replay, mazes)
+        print(episode_result(player.run()))
+        return
+
+    import pygame
+    from .constants import WIDTH, HEIGHT
+    from .rendering import SpectatorView
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Pac-Man replay: seed {replay.seed}")
+    view = SpectatorView(screen, pygame.time.Clock() if args.fps else None, fps=args.fps)
+    player = ReplayPlayer(replay, mazes, observers=[view])
+    player.seek(args.start)
+    view.maze = None  # seek() played on unseen, so draw the board afresh
+    view(player.sim)
+    running = True
+    while running and not player.done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        player.step()
+    pygame.quit()
+    print(episode_result(player.sim), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
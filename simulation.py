@@ -0,0 +1,364 @@
+# pacman/simulation.py
+import random
+from .bitboards import bit_maze
+from .config import DEFAULT_CONFIG
+from .constants import NOOP, WARP_LEFT, WARP_RIGHT
+from .danger import DangerField
+from .distances import DistanceMap, distance_table
+from .events import log
+from .layouts import LEVELS, as_layout
+from .pellets import PelletIndex
+from .planner import Planner
+from .game_logic import find_target, move_all, check_collision, reset_level, heuristic, action_target, action_for
+
+def is_path_still_safe(path, ghosts, safe_dist=3, distances=None, danger=None):
+    """Check if the remaining path is still safe from ghosts."""
+    if danger is not None:
+        for pos in path:
+            if danger.walk_rows[pos[0]][pos[1]] < safe_dist:
+                log.debug("Path unsafe: ghost too close to path position %s (dist=%s)", pos, danger.walk_rows[pos[0]][pos[1]])
+                return False
+        return True
+    distance = distances.maze_distance if distances else heuristic
+    active = ghosts.active_positions()
+    for pos in path:
+        for ghost_pos in active:
+            dist_to_ghost = distance(pos, ghost_pos)
+            if dist_to_ghost < safe_dist:
+                log.debug("Path unsafe: ghost at %s too close to path position %s (dist=%s)", list(ghost_pos), pos, dist_to_ghost)
+                return False
+    return True
+
+class Snapshot:
+    """A Simulation's game state at one tick; see Simulation.snapshot()."""
+
+    __slots__ = ("level", "layout", "maze", "maze_rows", "pellets", "pellet_state", "ghosts", "ghost_state",
+                 "pacman_pos", "direction", "score", "state", "cause", "ticks", "action", "power_mode",
+                 "power_timer", "ghosts_eaten", "path", "recalculate_path", "move_timer", "rng")
+
+class Simulation:
+    """Headless game engine: each call to step() advances the game by one tick.
+
+    Nothing here touches pygame or a clock, so episodes run as fast as the
+    game logic allows. Observers are called with the simulation after every
+    tick; the pygame window in main.py is just one of them. Game events are
+    recorded to events, an event sink (see events.py), when one is given, and
+    each phase of a tick is timed by profiler (see profiling.py) when one is.
+    The levels are played through mazes, Layouts or plain grids (see layouts.py).
+    Pac-Man follows the built-in A* agent unless an agent (see agents.py) is given.
+    The tunable constants of the ghosts and the built-in agent come from config
+    (see config.py).
+    """
+
+    def __init__(self, level=0, observers=None, seed=None, events=None, mazes=LEVELS, profiler=None, agent=None,
+                 config=DEFAULT_CONFIG):
+        self.mazes = mazes
+        self.config = config
+        self.level = level
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.score = 0
+        self.state = "playing"
+        self.cause = None
+        self.ticks = 0
+        self.action = NOOP
+        self.observers = list(observers or [])
+        self.events = events
+        self.profiler = profiler
+        self.agent = agent
+        self.reset_level()
+
+    def reset_level(self):
+        self.layout = as_layout(self.mazes[self.level])
+        self.maze, self.pacman_pos, self.direction, self.ghosts = reset_level(self.level, self.mazes)
+        self.pellets = PelletIndex(self.maze)
+        # The rows start out as the layout's own, copied on the first pellet eaten from each
+        self._shared_rows = set(range(len(self.maze)))
+        self.prepare_level()
+        self.power_mode = False
+        self.power_timer = 0
+        self.ghosts_eaten = 0
+        self.path = []
+        self.recalculate_path = True
+        self.move_timer = 0
+        self._emit("level_start", self.pacman_pos, self.level)
+
+    def prepare_level(self):
+        """Build the distance table, danger field, planner and bitboards for self.layout."""
+        layout = self.layout
+        self.bits = bit_maze(self.maze, layout.warp_rows)
+        self.distances = distance_table(self.maze, warp_rows=layout.warp_rows)
+        self.pacman_map = DistanceMap(self.maze, layout.warp_rows, self.distances)
+        self.danger = DangerField(layout.rows, layout.cols, self.config.ghost_radius, self.config.ghost_penalty,
+                                  distances=self.distances, warp_rows=layout.warp_rows)
+        self.planner = Planner(self.maze, warp_rows=layout.warp_rows)
+
+    def snapshot(self, rng=True):
+        """Capture the game state, for restore() to return to.
+
+        Nothing is deep-copied: the snapshot shares the maze rows and pellet
+        buckets, which the simulation copies before it next eats from them,
+        and copies the ghosts' fields into tuples, so it takes about a
+        kilobyte. rng=False leaves out the random state (another 5 KiB), for
+        lookahead that does not need the ghosts' dice to repeat.
+        """
+        snapshot = Snapshot()
+        snapshot.level, snapshot.layout = self.level, self.layout
+        snapshot.maze, snapshot.maze_rows = self.maze, tuple(self.maze)
+        self._shared_rows = set(range(len(self.maze)))
+        snapshot.pellets, snapshot.pellet_state = self.pellets, self.pellets.snapshot()
+        snapshot.ghosts, snapshot.ghost_state = self.ghosts, self.ghosts.pack()
+        snapshot.pacman_pos = (self.pacman_pos[0], self.pacman_pos[1])
+        snapshot.direction, snapshot.score, snapshot.state, snapshot.cause = self.direction, self.score, self.state, self.cause
+        snapshot.ticks, snapshot.action = self.ticks, self.action
+        snapshot.power_mode, snapshot.power_timer, snapshot.ghosts_eaten = self.power_mode, self.power_timer, self.ghosts_eaten
+        snapshot.path, snapshot.recalculate_path, snapshot.move_timer = tuple(self.path), self.recalculate_path, self.move_timer
+        snapshot.rng = self.rng.getstate() if rng else None
+        return snapshot
+
+    def restore(self, snapshot):
+        """Return to the game state of a snapshot taken from this simulation.
+
+        A snapshot can be restored any number of times. Without a saved
+        random state the ghosts keep drawing from the current one.
+        """
+        new_level = snapshot.layout is not self.layout
+        self.level, self.layout = snapshot.level, snapshot.layout
+        self.maze = snapshot.maze
+        self.maze[:] = snapshot.maze_rows
+        self._shared_rows = set(range(len(self.maze)))
+        self.pellets = snapshot.pellets
+        self.pellets.restore(snapshot.pellet_state)
+        self.ghosts = snapshot.ghosts
+        self.ghosts.unpack(snapshot.ghost_state)
+        self.pacman_pos[:] = snapshot.pacman_pos
+        self.direction, self.score, self.state, self.cause = snapshot.direction, snapshot.score, snapshot.state, snapshot.cause
+        self.ticks, self.action = snapshot.ticks, snapshot.action
+        self.power_mode, self.power_timer, self.ghosts_eaten = snapshot.power_mode, snapshot.power_timer, snapshot.ghosts_eaten
+        self.path, self.recalculate_path, self.move_timer = list(snapshot.path), snapshot.recalculate_path, snapshot.move_timer
+        if snapshot.rng is not None:
+            self.rng.setstate(snapshot.rng)
+        if new_level:
+            self.prepare_level()
+
+    def reachable_pellets(self):
+        """The pellets Pac-Man can reach without passing an active ghost, as a bitboard."""
+        ghosts = self.bits.board(self.ghosts.active_positions())
+        return self.bits.reachable(self.pacman_pos, blocked=ghosts) & self.pellets.bits
+
+    def _clear_cell(self, pos):
+        """Empty a maze cell, first copying its row if a snapshot shares it."""
+        r, c = pos
+        if r in self._shared_rows:
+            self.maze[r] = self.maze[r][:]
+            self._shared_rows.discard(r)
+        self.maze[r][c] = 0
+
+    def _emit(self, event, pos=None, value=0):
+        if self.events is not None:
+            self.events.emit(self.ticks, event, None if pos is None else (pos[0], pos[1]), value)
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    @property
+    def done(self):
+        return self.state != "playing"
+
+    def step(self, action=None):
+        """Advance one tick and notify observers. Returns the game state.
+
+        Pac-Man is moved by action (one of the action codes in constants)
+        when it is given, otherwise by self.agent or the built-in A* agent.
+        Either way the move made is left in self.action.
+        """
+        if self.done:
+            return self.state
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_tick(self.ticks)
+        if action is None and self.agent is not None:
+            action = self.agent.act(self)
+            if profiler is not None:
+                profiler.mark("agent")
+        self._tick(action)
+        self.ticks += 1
+        for observer in self.observers:
+            observer(self)
+        if profiler is not None:
+            profiler.mark("render")
+            profiler.end_tick()
+        return self.state
+
+    def run(self, max_ticks=None):
+        """Step until the game ends or max_ticks ticks have been played."""
+        while not self.done and (max_ticks is None or self.ticks < max_ticks):
+            self.step()
+        return self.state
+
+    def _agent_move(self):
+        """Let the built-in agent plan; returns the cell it moves Pac-Man to, or None."""
+        maze, pacman_pos, ghosts = self.maze, self.pacman_pos, self.ghosts
+        danger, profiler = self.danger, self.profiler
+        danger.update(ghosts)
+        # Recalculate path if needed or if the current path becomes unsafe
+        if self.path and not self.power_mode:
+            if not is_path_still_safe(self.path, ghosts, distances=self.distances, danger=danger):
+                log.debug("Path became unsafe, recalculating...")
+                self.path = []
+                self.recalculate_path = True
+        if profiler is not None:
+            profiler.mark("safety")
+            profiler.count("nearest_ghost", danger.walk_rows[pacman_pos[0]][pacman_pos[1]])
+
+        if self.recalculate_path or not self.path or pacman_pos == list(self.path[-1]):
+            target = find_target(pacman_pos, maze, ghosts, self.power_mode, self.power_timer, self.distances, self.pellets, danger,
+                                 self.layout.warp_rows, self.layout.respawn, self.pacman_map, self.config.safe_dist)
+            if profiler is not None:
+                profiler.mark("target")
+            if target:
+                expanded = self.planner.expanded
+                self.path = self.planner.plan(pacman_pos, target, danger, self.power_mode) or []
+                if profiler is not None:
+                    profiler.mark("planning")
+                    profiler.count("expanded", self.planner.expanded - expanded)
+                self._emit("replan", target, len(self.path))
+            self.recalculate_path = False
+
+        self.move_timer += 1
+        delay = self.config.power_mode_delay if self.power_mode else 0.9
+        if not (self.path and self.move_timer >= delay):
+            return None
+        next_pos = list(self.path[0])
+        if not self.power_mode and danger.nearest_rows[pacman_pos[0]][pacman_pos[1]] < 1.5:
+            log.debug("Ghost too close to %s, recalculating path", pacman_pos)
+            self.recalculate_path = True
+            self.path = []
+            return None
+        cols = len(maze[0])
+        if next_pos[0] in self.layout.warp_rows:
+            if next_pos[1] < 0:
+                next_pos[1] = cols - 1
+                log.debug("Pac-Man warped from [%s, 0] to [%s, %s]", next_pos[0], next_pos[0], next_pos[1])
+            elif next_pos[1] >= cols:
+                next_pos[1] = 0
+                log.debug("Pac-Man warped from [%s, %s] to [%s, %s]", next_pos[0], cols-1, next_pos[0], next_pos[1])
+        self.path.pop(0)
+        self.move_timer = 0
+        return next_pos
+
+    def _tick(self, action=None):
+        maze, pacman_pos, ghosts = self.maze, self.pacman_pos, self.ghosts
+        profiler = self.profiler
+        if action is None:
+            next_pos = self._agent_move()
+            self.action = action_for(pacman_pos, next_pos, maze, self.layout.warp_rows) if next_pos else NOOP
+        else:
+            next_pos = action_target(pacman_pos, action, maze, self.layout.warp_rows)
+            self.action = action
+        if next_pos:
+            if next_pos[0] < pacman_pos[0]:
+                self.direction = "UP"
+            elif next_pos[0] > pacman_pos[0]:
+                self.direction = "DOWN"
+            elif next_pos[1] < pacman_pos[1]:
+                self.direction = "LEFT"
+            elif next_pos[1] > pacman_pos[1]:
+                self.direction = "RIGHT"
+            pacman_pos[0], pacman_pos[1] = next_pos
+            if self.action in (WARP_LEFT, WARP_RIGHT):
+                self._emit("warp", pacman_pos)
+            if profiler is not None:
+                profiler.mark("pacman_move")
+            score = self.score
+            collision, self.score, self.ghosts_eaten, self.recalculate_path = check_collision(pacman_pos, ghosts, self.power_mode, self.score, self.ghosts_eaten)
+            if profiler is not None:
+                profiler.mark("collision")
+            if collision == "game_over":
+                self.state = "game_over"
+                self.cause = "ran_into_ghost"
+                self._emit("game_over", pacman_pos, self.score)
+                return
+            elif collision == "eat_ghost":
+                self.recalculate_path = True
+                self._emit("eat_ghost", pacman_pos, self.score - score)
+        elif profiler is not None:
+            profiler.mark("pacman_move")
+        if maze[pacman_pos[0]][pacman_pos[1]] == 2:
+            self._clear_cell(pacman_pos)
+            self.pellets.eat(pacman_pos)
+            self.score += 10
+            self._emit("pellet", pacman_pos, self.score)
+        elif maze[pacman_pos[0]][pacman_pos[1]] == 3:
+            self._clear_cell(pacman_pos)
+            self.pellets.eat(pacman_pos)
+            self.score += 50
+            self._emit("power_pellet", pacman_pos, self.score)
+            self.power_mode = True
+            self.power_timer = 60
+            ghosts.frighten()
+            self.recalculate_path = True
+        if not self.pellets.remaining:
+            self.level += 1
+            if self.level < len(self.mazes):
+                log.info("Level %s Start! Score: %s", self.level + 1, self.score)
+                self.reset_level()
+                maze, pacman_pos, ghosts = self.maze, self.pacman_pos, self.ghosts
+            else:
+                log.info("You Win All Levels! Final Score: %s", self.score)
+                self.state = "win"
+                self._emit("win", pacman_pos, self.score)
+                return
+        if profiler is not None:
+            profiler.mark("pellets")
+        move_all(ghosts, maze, pacman_pos, self.power_mode, self.rng, after_move=self._ghost_moved,
+                 warp_rows=self.layout.warp_rows, spawn=self.layout.respawn, pacman_map=self.pacman_map, config=self.config)
+        if profiler is not None:
+            profiler.mark("ghosts")
+        if self.power_mode:
+            self.power_timer -= 1
+            if self.power_timer <= 0:
+                self._emit("power_end", pacman_pos, self.ghosts_eaten)
+                self.power_mode = False
+                self.ghosts_eaten = 0
+                ghosts.calm()
+                self.recalculate_path = True
+        if profiler is not None:
+            profiler.mark("pellets")
+
+    def _ghost_moved(self, i):
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.mark("ghosts")
+        score = self.score
+        collision, self.score, self.ghosts_eaten, recalculate = check_collision(self.pacman_pos, self.ghosts, self.power_mode, self.score, self.ghosts_eaten)
+        if profiler is not None:
+            profiler.mark("collision")
+        if collision == "game_over":
+            if self.state == "playing":
+                self.state = "game_over"
+                self.cause = self.cause or "caught_by_ghost"
+                self._emit("game_over", self.pacman_pos, self.score)
+            return True
+        elif collision == "eat_ghost":
+            self.recalculate_path = True
+            self._emit("eat_ghost", self.pacman_pos, self.score - score)
+        return False
+
+def run_episode(level=0, max_ticks=None, seed=None, events=None, mazes=LEVELS, agent=None, config=DEFAULT_CONFIG):
+    """Play one headless episode with agent, or the built-in A* agent."""
+    sim = Simulation(level, seed=seed, events=events, mazes=mazes, agent=agent, config=config)
+    if sim.run(max_ticks) == "playing":
+        sim.cause = "timeout"
+    return sim
+
+def episode_result(sim):
+    """Summarise a finished episode as a flat, JSON/CSV-friendly dict."""
+    return {
+        "seed": sim.seed,
+        "state": sim.state,
+        "score": sim.score,
+        "level": min(sim.level, len(sim.mazes) - 1) + 1,
+        "ticks": sim.ticks,
+        "cause": sim.cause,
+    }
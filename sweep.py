@@ -0,0 +1,203 @@
+# pacman/sweep.py
+"""Parameter sweeps over GameConfig, played as seeded batches.
+
+    python -m pacman.sweep safe_dist=3,4,5 ghost_penalty=50,100,200 --seeds 0:100
+    python -m pacman.sweep safe_dist=2:6 ghost_random_rate=0.1:0.4 --random 40 --seeds 0:100
+
+Each name=A,B,C lists values to try; a grid sweep plays every combination.
+With --random N, name=LOW:HIGH is a range instead, and N points are drawn
+from it (whole numbers when both ends are). Values not named keep their
+defaults. Every point plays the same seeds, spread over worker processes,
+and the points are ranked by mean score.
+
+Episode results go to the cache directory as they finish, one JSONL file
+per point named by a hash of its config, the tick limit and the mazes' contents,
+so editing a maze file starts its points afresh.
+Running a sweep again, or a bigger one, only plays the seeds a point does
+not already have, so an interrupted sweep picks up where it stopped.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .batch import parse_seeds, play_seed, _init_worker
+from .config import DEFAULT_CONFIG, GameConfig
+from .layouts import LEVELS, as_layout, load_mazes
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def parse_param(text, ranges=False):
+    """("name", values) from "name=A,B,C", or ("name", (low, high)) from "name=LOW:HIGH" with ranges."""
+    name, sep, values = text.partition("=")
+    if not sep or name not in GameConfig.FIELDS:
+        raise ValueError(f"Expected name=values with a name from {', '.join(GameConfig.FIELDS)}: {text!r}")
+    if ranges:
+        low, sep, high = values.partition(":")
+        if not sep:
+            raise ValueError(f"Expected name=LOW:HIGH for a random sweep: {text!r}")
+        return name, (_number(low), _number(high))
+    return name, [_number(value) for value in values.split(",")]
+
+def grid_points(params, base=DEFAULT_CONFIG):
+    """A config for every combination of the {name: values} in params."""
+    names = list(params)
+    return [base.replace(**dict(zip(names, values))) for values in itertools.product(*params.values())]
+
+def random_points(params, count, seed=None, base=DEFAULT_CONFIG):
+    """count configs drawn uniformly from the {name: (low, high)} ranges in params."""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(count):
+        values = {name: rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+                  for name, (low, high) in params.items()}
+        points.append(base.replace(**values))
+    return points
+
+def mazes_key(mazes_path=None):
+    """A short hash of the levels in mazes_path (the built-in ones for None): their grids and start cells."""
+    digest = hashlib.sha1()
+    mazes = LEVELS if mazes_path is None else load_mazes(mazes_path)
+    for level in range(len(mazes)):
+        layout = as_layout(mazes[level])
+        digest.update(repr((layout.grid.shape, layout.pacman, layout.ghosts, layout.respawn, layout.warp_rows)).encode())
+        digest.update(layout.grid.tobytes())
+    return digest.hexdigest()[:16]
+
+def point_key(config, max_ticks=None, mazes=None):
+    """The cache key of a sweep point: its config and everything else that changes its results,
+    with mazes the mazes_key() of the levels it plays."""
+    text = json.dumps({"config": config.key(), "max_ticks": max_ticks, "mazes": mazes}, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+class SweepCache:
+    """Episode results per sweep point, as append-only JSONL files under a directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.jsonl")
+
+    def load(self, key):
+        """{seed: result} of the episodes already played for key."""
+        results = {}
+        if os.path.exists(self.path(key)):
+            with open(self.path(key)) as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short when a sweep was killed
+                    if "seed" in result:
+                        results[result["seed"]] = result
+        return results
+
+    def add(self, key, config, result):
+        f = self._files.get(key)
+        if f is None:
+            new = not os.path.exists(self.path(key))
+            f = self._files[key] = open(self.path(key), "a")
+            if new:
+                f.write(json.dumps({"config": config.as_dict()}) + "\n")
+        f.write(json.dumps(result) + "\n")
+        f.flush()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+def summarize(key, config, results):
+    scores = np.array([result["score"] for result in results], dtype=float)
+    return {
+        "key": key,
+        "config": config.as_dict(),
+        "episodes": len(results),
+        "mean_score": round(float(scores.mean()), 2),
+        "std_score": round(float(scores.std()), 2),
+        "win_rate": round(sum(result["state"] == "win" for result in results) / len(results), 4),
+        "mean_ticks": round(float(np.mean([result["ticks"] for result in results])), 1),
+    }
+
+def _play_point(job):
+    key, params, seed, max_ticks, mazes_path = job
+    return key, play_seed(seed, max_ticks, mazes_path=mazes_path, config=GameConfig(**params))
+
+def run_sweep(points, seeds, cache_dir, workers=None, max_ticks=None, mazes_path=None, verbose=False, report=None):
+    """Play seeds at every point, reusing cached episodes; returns the summaries, best mean score first."""
+    cache = SweepCache(cache_dir)
+    mazes = mazes_key(mazes_path)
+    keys = [point_key(config, max_ticks, mazes) for config in points]
+    results = {key: cache.load(key) for key in keys}
+    configs = dict(zip(keys, points))
+    jobs = [(key, configs[key].as_dict(), seed, max_ticks, mazes_path)
+            for key in configs for seed in seeds if seed not in results[key]]
+    if report:
+        report(f"{len(configs)} points x {len(seeds)} seeds, {len(jobs)} episodes to play")
+    try:
+        if jobs:
+            chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 8))
+            log_level = logging.DEBUG if verbose else logging.WARNING
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_level,)) as pool:
+                for done, (key, result) in enumerate(pool.map(_play_point, jobs, chunksize=chunksize), 1):
+                    cache.add(key, configs[key], result)
+                    results[key][result["seed"]] = result
+                    if report and done % 100 == 0:
+                        report(f"{done}/{len(jobs)} episodes")
+    finally:
+        cache.close()
+    summaries = [summarize(key, configs[key], [results[key][seed] for seed in seeds]) for key in configs]
+    return sorted(summaries, key=lambda summary: -summary["mean_score"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep game and agent constants over seeded Pac-Man episodes.")
+    parser.add_argument("params", nargs="+", help="name=A,B,C values (grid) or name=LOW:HIGH ranges (--random)")
+    parser.add_argument("--random", type=int, default=None, metavar="N", help="draw N random points instead of the full grid")
+    parser.add_argument("--sample-seed", type=int, default=0, help="seed for drawing random points")
+    parser.add_argument("--seeds", default="100", help='"N" for seeds 0..N-1 or "START:STOP", played at every point')
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="stop an episode after this many ticks")
+    parser.add_argument("--mazes", default=None, metavar="FILE", help="play the levels of this maze file (text or .pmz)")
+    parser.add_argument("--cache", default="sweep-cache", metavar="DIR", help="where episode results are kept between runs")
+    parser.add_argument("--output", default=None, help="write the point summaries as JSONL to this file")
+    parser.add_argument("--verbose", action="store_true", help="log the game's debug messages to stderr")
+    args = parser.parse_args(argv)
+
+    try:
+        params = dict(parse_param(text, ranges=args.random is not None) for text in args.params)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.random is not None:
+        points = random_points(params, args.random, args.sample_seed)
+    else:
+        points = grid_points(params)
+    seeds = list(parse_seeds(args.seeds))
+    if not seeds:
+        parser.error("--seeds selects no seeds")
+    summaries = run_sweep(points, seeds, args.cache, args.workers, args.max_ticks, args.mazes,
+                          args.verbose, report=lambda message: print(message, file=sys.stderr))
+    names = list(params)
+    print(f"{'rank':>4} {'mean score':>11} {'std':>9} {'wins':>6} {'ticks':>8}  " + "  ".join(names))
+    for rank, summary in enumerate(summaries, 1):
+        values = "  ".join(f"{name}={summary['config'][name]:g}" for name in names)
+        print(f"{rank:>4} {summary['mean_score']:>11.1f} {summary['std_score']:>9.1f} {summary['win_rate']:>6.1%} "
+              f"{summary['mean_ticks']:>8.0f}  {values}")
+    if args.output:
+        with open(args.output, "w") as f:
+            for summary in summaries:
+                f.write(json.dumps(summary) + "\n")
+
+if __name__ == "__main__":
+    main()
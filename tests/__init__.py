@@ -0,0 +1 @@
+# pacman/tests/__init__.py
@@ -0,0 +1,28 @@
+# pacman/tests/test_agents.py
+from time import perf_counter, sleep
+from pacman.agents import LookaheadAgent
+from pacman.simulation import Simulation
+
+class SlowSimulation(Simulation):
+    """A game whose ticks take a millisecond, so that one look twenty ticks
+    ahead takes twice a 10 ms budget."""
+
+    def step(self, action=None):
+        sleep(0.001)
+        return super().step(action)
+
+def test_lookahead_stops_at_its_budget():
+    agent = LookaheadAgent(budget_ms=10, horizon=20, seed=0)
+    sim = SlowSimulation(seed=0)
+    for _ in range(5):
+        start = perf_counter()
+        action = agent.act(sim)
+        assert (perf_counter() - start) * 1000 < 14
+        assert action is not None
+        sim.step(action)
+
+def test_lookahead_without_budget_leaves_the_move_to_the_built_in_agent():
+    sim = Simulation(seed=0)
+    assert LookaheadAgent(budget_ms=0, seed=0).act(sim) is None
+    sim.step(None)
+    assert sim.ticks == 1
@@ -0,0 +1,46 @@
+# pacman/tests/test_bitboards.py
+import random
+import pytest
+from pacman.bitboards import bit_maze
+from pacman.constants import MAZES, WARP_ROW
+from pacman.distances import distance_table
+from pacman.simulation import Simulation
+from .test_distances import moves_bfs
+
+@pytest.mark.parametrize("level", range(len(MAZES)))
+def test_reachable_and_within_match_bfs(level):
+    maze = MAZES[level]
+    bits = bit_maze(maze)
+    for start in distance_table(maze).cells:
+        dist = moves_bfs(maze, start)
+        assert set(bits.cells(bits.reachable(start))) == set(dist)
+        for steps in (1, 2, 5):
+            assert set(bits.cells(bits.within(start, steps))) == {pos for pos, d in dist.items() if d <= steps}
+
+@pytest.mark.parametrize("level", range(len(MAZES)))
+def test_reachable_around_blocked_cells_matches_bfs(level):
+    maze = MAZES[level]
+    bits = bit_maze(maze)
+    cells = distance_table(maze).cells
+    rng = random.Random(level)
+    for _ in range(200):
+        start = rng.choice(cells)
+        blocked = set(rng.sample(cells, 4))
+        assert set(bits.cells(bits.reachable(start, bits.board(blocked)))) == set(moves_bfs(maze, start, blocked))
+
+@pytest.mark.parametrize("level", range(len(MAZES)))
+def test_tunnel_crosses_to_the_far_side(level):
+    maze = MAZES[level]
+    bits = bit_maze(maze)
+    last = len(maze[0]) - 1
+    assert bits.moves((WARP_ROW, 1)) & bits.bit((WARP_ROW, last))
+    assert bits.within((WARP_ROW, 1), 2) & bits.bit((WARP_ROW, last - 1))
+
+def test_reachable_pellets_match_bfs_during_play():
+    sim = Simulation(seed=3)
+    while not sim.done and sim.ticks < 300:
+        sim.step()
+        blocked = set(sim.ghosts.active_positions())
+        reachable = moves_bfs(sim.maze, tuple(sim.pacman_pos), blocked)
+        pellets = {pos for pos in reachable if sim.maze[pos[0]][pos[1]] in (2, 3)}
+        assert set(sim.bits.cells(sim.reachable_pellets())) == pellets
@@ -0,0 +1,17 @@
+# pacman/tests/test_danger.py
+import pytest
+from pacman.game_logic import find_target
+from pacman.simulation import Simulation, is_path_still_safe
+
+@pytest.mark.parametrize("seed", [1, 6])
+def test_danger_field_keeps_decisions(seed):
+    sim = Simulation(seed=seed)
+    while not sim.done and sim.ticks < 400:
+        sim.danger.update(sim.ghosts)
+        targets = [find_target(sim.pacman_pos, sim.maze, sim.ghosts, sim.power_mode, sim.power_timer, sim.distances,
+                               sim.pellets, danger, sim.layout.warp_rows, sim.layout.respawn, safe_dist=sim.config.safe_dist)
+                   for danger in (sim.danger, None)]
+        assert targets[0] == targets[1], sim.ticks
+        assert is_path_still_safe(sim.path, sim.ghosts, distances=sim.distances, danger=sim.danger) == \
+               is_path_still_safe(sim.path, sim.ghosts, distances=sim.distances), sim.ticks
+        sim.step()
@@ -0,0 +1,98 @@
+# pacman/tests/test_distances.py
+from collections import deque
+import pytest
+from pacman.constants import MAZES, WARP_ROW, WARP_ROWS, UP, WARP_RIGHT
+from pacman.distances import DistanceMap, distance_table
+from pacman.game_logic import a_star, action_target
+from pacman.planner import maze_graph
+
+# A second warp row two rows above the tunnel, so their warp reaches overlap
+TWO_WARP_ROWS = (WARP_ROW - 2, WARP_ROW)
+
+def moves_bfs(maze, source, blocked=(), warp_rows=WARP_ROWS):
+    """{cell: moves} from source, taking every action Simulation.step() allows
+    and never entering a blocked cell."""
+    if source in blocked:
+        return {}
+    dist = {source: 0}
+    queue = deque([source])
+    while queue:
+        pos = queue.popleft()
+        for action in range(UP, WARP_RIGHT + 1):
+            step = action_target(pos, action, maze, warp_rows)
+            if step is not None and tuple(step) not in dist and tuple(step) not in blocked:
+                dist[tuple(step)] = dist[pos] + 1
+                queue.append(tuple(step))
+    return dist
+
+def graph_bfs(graph, source):
+    """{cell: moves} from source over the edges a_star() and the planner search."""
+    cols = graph.cols
+    dist = {source: 0}
+    queue = deque([source[0] * cols + source[1]])
+    while queue:
+        u = queue.popleft()
+        for v, r, c, _ in graph.succ[u]:
+            if (r, c) not in dist:
+                dist[(r, c)] = dist[divmod(u, cols)] + 1
+                queue.append(v)
+    return dist
+
+@pytest.mark.parametrize("level", range(len(MAZES)))
+def test_tunnel_through_wall_ends(level):
+    maze = MAZES[level]
+    table = distance_table(maze)
+    last = len(maze[0]) - 1
+    assert maze[WARP_ROW][0] == maze[WARP_ROW][last] == 1
+    assert table.has_warp
+    assert table.maze_distance((WARP_ROW, 1), (WARP_ROW, last - 1)) == 2
+    assert table.maze_distance((WARP_ROW, last), (WARP_ROW, last - 1)) == 1
+
+@pytest.mark.parametrize("level", range(len(MAZES)))
+def test_table_matches_bfs_over_moves(level):
+    maze = MAZES[level]
+    table = distance_table(maze)
+    graph = maze_graph(maze)
+    for a in table.cells:
+        by_moves = moves_bfs(maze, a)
+        assert graph_bfs(graph, a) == by_moves
+        for b in table.cells:
+            assert table.maze_distance(a, b) == by_moves.get(b, float("inf")), (a, b)
+
+def test_two_warp_rows_match_the_warp_actions():
+    maze = MAZES[0]
+    table = distance_table(maze, warp_rows=TWO_WARP_ROWS)
+    graph = maze_graph(maze, TWO_WARP_ROWS)
+    for a in table.cells:
+        by_moves = moves_bfs(maze, a, warp_rows=TWO_WARP_ROWS)
+        assert graph_bfs(graph, a) == by_moves
+        for b in table.cells:
+            assert table.maze_distance(a, b) == by_moves.get(b, float("inf")), (a, b)
+        for b in table.cells[::5]:
+            path = a_star(a, b, maze, None, True, warp_rows=TWO_WARP_ROWS)
+            assert all(table.maze_distance(p, q) == 1 for p, q in zip(path, path[1:])), (a, b, path)
+
+@pytest.mark.parametrize("level", range(len(MAZES)))
+def test_a_star_paths_follow_table(level):
+    # a_star()'s heuristic only knows the tunnel on the tunnel row itself, so
+    # its paths can be longer than the shortest, but never shorter, and every
+    # step of them is a move the table counts.
+    maze = MAZES[level]
+    table = distance_table(maze)
+    for a in table.cells:
+        for b in table.cells:
+            path = a_star(a, b, maze, None, True)
+            assert path is not None and len(path) - 1 >= table.maze_distance(a, b), (a, b)
+            assert all(table.maze_distance(p, q) == 1 for p, q in zip(path, path[1:])), (a, b, path)
+
+@pytest.mark.parametrize("level", range(len(MAZES)))
+def test_distance_map_matches_table(level):
+    maze = MAZES[level]
+    table = distance_table(maze)
+    with_table, by_bfs = DistanceMap(maze, distances=table), DistanceMap(maze)
+    for origin in table.cells[::7]:
+        with_table.update(origin)
+        by_bfs.update(origin)
+        assert with_table.grid == by_bfs.grid
+        for r, c in table.cells:
+            assert with_table.grid[r][c] == table.maze_distance(origin, (r, c))
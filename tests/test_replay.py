@@ -0,0 +1,38 @@
+# pacman/tests/test_replay.py
+from pacman.config import GameConfig
+from pacman.layouts import LEVELS, Layout
+from pacman.replay import Replay, ReplayPlayer, ReplayRecorder, CONFIG_SIZE, HEADER
+from pacman.simulation import Simulation
+
+def record(seed, config, max_ticks=400, mazes=LEVELS):
+    sim = Simulation(seed=seed, config=config, mazes=mazes)
+    recorder = ReplayRecorder(sim)
+    sim.run(max_ticks)
+    return sim, recorder.replay()
+
+def test_replay_plays_back_with_its_config():
+    config = GameConfig(ghost_move_ticks=3, safe_dist=2)
+    sim, replay = record(5, config)
+    loaded = Replay.from_bytes(replay.to_bytes())
+    assert loaded.config == config
+    played = ReplayPlayer(loaded).run()
+    assert (played.ticks, played.score, played.state) == (sim.ticks, sim.score, sim.state)
+
+def test_version_1_replays_use_the_default_config():
+    _, replay = record(5, GameConfig())
+    data = replay.to_bytes()
+    size, = CONFIG_SIZE.unpack_from(data, HEADER.size)
+    header = bytearray(data[:HEADER.size])
+    header[4:6] = (1).to_bytes(2, "little")  # the version, after the magic
+    loaded = Replay.from_bytes(bytes(header) + data[HEADER.size + CONFIG_SIZE.size + size:])
+    assert loaded.config == GameConfig()
+    ReplayPlayer(loaded).run()
+
+def test_replays_with_two_warp_rows():
+    # Every planned warp has to be one the warp actions make, or the move is
+    # recorded as NOOP and the replay goes its own way
+    mazes = [Layout(layout.grid, layout.pacman, layout.ghosts, layout.respawn, (5, 7)) for layout in LEVELS]
+    for seed in range(10):
+        sim, replay = record(seed, GameConfig(), 1500, mazes)
+        played = ReplayPlayer(replay, mazes).run()
+        assert (played.ticks, played.score, played.state) == (sim.ticks, sim.score, sim.state), seed
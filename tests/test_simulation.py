@@ -0,0 +1,35 @@
+# pacman/tests/test_simulation.py
+from pacman.simulation import Simulation, run_episode
+
+class ListSink:
+    """An event sink that keeps the events in a list."""
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, tick, event, pos=None, value=0):
+        self.events.append((tick, event, pos, value))
+
+def test_one_game_over_event_per_lost_episode():
+    lost = 0
+    for seed in range(20):
+        sink = ListSink()
+        sim = run_episode(seed=seed, max_ticks=1500, events=sink)
+        game_overs = [event for event in sink.events if event[1] == "game_over"]
+        if sim.state == "game_over":
+            lost += 1
+            assert len(game_overs) == 1, seed
+            assert game_overs[0][0] == sim.ticks - 1 and game_overs[0][3] == sim.score
+        else:
+            assert not game_overs
+    assert lost
+
+def test_levels_share_the_layout_rows_and_never_write_to_them():
+    sim = Simulation(seed=0)
+    rows = sim.layout.shared_rows()
+    assert all(mine is shared for mine, shared in zip(sim.maze, rows))
+    sim.run(300)
+    assert [list(row) for row in rows] == sim.layout.grid.tolist()
+    assert sim.maze != list(rows)
+    # Rows Pac-Man has not eaten from are still shared
+    assert any(mine is shared for mine, shared in zip(sim.maze, rows))
@@ -0,0 +1,14 @@
+# pacman/tests/test_sweep.py
+from pacman.config import GameConfig
+from pacman.layouts import LEVELS, Layout, save_mazes
+from pacman.sweep import mazes_key, point_key
+
+def test_point_key_follows_maze_contents(tmp_path):
+    path = str(tmp_path / "mazes.txt")
+    save_mazes(path, LEVELS[:1])
+    before = point_key(GameConfig(), 1000, mazes_key(path))
+    assert point_key(GameConfig(), 1000, mazes_key(path)) == before
+    grid = LEVELS[0].grid.copy()
+    grid[1, 2] = 0  # take a pellet out of the file
+    save_mazes(path, [Layout(grid)])
+    assert point_key(GameConfig(), 1000, mazes_key(path)) != before
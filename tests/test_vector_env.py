@@ -0,0 +1,74 @@
+# pacman/tests/test_vector_env.py
+import numpy as np
+import pytest
+from pacman.config import GameConfig
+from pacman.constants import UP, DOWN, LEFT, RIGHT, STAY
+from pacman.env import AsyncVectorEnv
+from pacman.simulation import Simulation, episode_result
+from pacman.vector_env import VectorPacmanEnv, STATES
+
+# Ghosts this slow let the built-in agent clear levels
+SLOW_GHOSTS = GameConfig(ghost_move_ticks=8)
+DIRECTIONS = {"UP": UP, "DOWN": DOWN, "LEFT": LEFT, "RIGHT": RIGHT}
+
+def play_lockstep(seeds, level=0, config=GameConfig(), max_ticks=3000):
+    """Play Simulation(seed=seed) for each seed, and a python_rng VectorPacmanEnv
+    with the same actions, checking after every tick that the games match."""
+    sims = [Simulation(level, seed=seed, config=config) for seed in seeds]
+    env = VectorPacmanEnv(len(sims), level=level, seed=seeds[0], python_rng=True, config=config)
+    for tick in range(max_ticks):
+        if all(sim.done for sim in sims):
+            break
+        actions = np.zeros(len(sims), dtype=int)
+        for k, sim in enumerate(sims):
+            if not sim.done:
+                sim.step()
+                actions[k] = sim.action
+        env.step(actions)
+        for k, sim in enumerate(sims):
+            where = f"seed {seeds[k]}, tick {tick}"
+            assert (STATES[env.state[k]], int(env.score[k]), int(env.level[k]), int(env.ticks[k])) == \
+                   (sim.state, sim.score, sim.level, sim.ticks), where
+            assert env.pacman[k].tolist() == list(sim.pacman_pos), where
+            assert env.direction[k] == DIRECTIONS[sim.direction], where
+            assert (bool(env.power_mode[k]), int(env.power_timer[k])) == (sim.power_mode, sim.power_timer), where
+            ghosts = env.ghosts
+            assert ghosts.rows[k].tolist() == sim.ghosts.rows, where
+            assert ghosts.cols[k].tolist() == sim.ghosts.cols, where
+            assert ghosts.frightened[k].tolist() == sim.ghosts.frightened, where
+            assert ghosts.eaten[k].tolist() == sim.ghosts.eaten, where
+    return sims, env
+
+def test_matches_simulation_every_tick():
+    seeds = list(range(100, 106))
+    sims, env = play_lockstep(seeds, max_ticks=600)
+    assert {sim.state for sim in sims} >= {"game_over"}
+    results = env.results()
+    for sim, result in zip(sims, results):
+        if sim.done:
+            assert result == episode_result(sim)
+
+def test_matches_simulation_through_level_change_and_win():
+    seeds = list(range(8))
+    sims, env = play_lockstep(seeds, config=SLOW_GHOSTS, max_ticks=1500)
+    assert any(sim.level > 0 for sim in sims)
+    assert [sim.state for sim in sims].count("win") >= 2
+    for sim, result in zip(sims, env.results()):
+        if sim.done:
+            assert result == episode_result(sim)
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_batch_plays_through_a_win(level):
+    sims, env = play_lockstep(list(range(6)), level=level, config=SLOW_GHOSTS, max_ticks=2000)
+    assert "win" in [sim.state for sim in sims]
+    assert [result["level"] for result in env.results() if result["state"] == "win"] == \
+           [len(env.mazes)] * [STATES[state] for state in env.state].count("win")
+
+def test_async_autoreset_never_repeats_a_seed():
+    with AsyncVectorEnv(3, workers=2, seed=10, max_ticks=5) as env:
+        env.reset()
+        seeds = []
+        for _ in range(15):
+            info = env.step([STAY] * 3)[4]
+            seeds += [result["seed"] for result in info["final_result"] if result is not None]
+    assert seeds == list(range(10, 19))
@@ -0,0 +1,327 @@
+# pacman/vector_env.py
+import random
+import numpy as np
+from .config import DEFAULT_CONFIG
+from .constants import MAZES, WARP_ROW, GHOST_SPAWN, RESPAWN_DELAY, UP, DOWN, LEFT, RIGHT, STAY, WARP_LEFT, WARP_RIGHT
+from .distances import UNREACHABLE, distance_table
+from .game_logic import reset_level
+
+PLAYING, GAME_OVER, WIN = 0, 1, 2
+STATES = ("playing", "game_over", "win")
+CAUSES = (None, "ran_into_ghost", "caught_by_ghost")
+
+# (row, col) step of each action; NOOP and the warps are handled separately
+_ACTION_DELTAS = np.array([(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1), (0, 0), (0, 0), (0, 0)])
+# Ghost moves, in the order move_ghost() tries them
+_DIRECTIONS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+_ANY_DIRECTION = [0, 1, 2, 3]
+
+def walk_matrix(maze):
+    """maze_distance() between every pair of cells, as a (cells, cells) array indexed by r * cols + c."""
+    table = distance_table(maze, max_cells=len(maze) * len(maze[0]))
+    rows, cols = len(maze), len(maze[0])
+    r, c = np.divmod(np.arange(rows * cols), cols)
+    walks = (np.abs(r[:, None] - r) + np.abs(c[:, None] - c)).astype(float)
+    is_open = np.frombuffer(table.index, dtype=np.int32) >= 0
+    pairs = np.frombuffer(table.table, dtype=np.uint16).reshape(table.size, table.size)
+    walks[np.ix_(is_open, is_open)] = np.where(pairs == UNREACHABLE, np.inf, pairs)
+    return walks
+
+class VectorPacmanEnv:
+    """num_envs games played in lockstep, each piece of game state stacked into one array.
+
+    step(actions) moves every Pac-Man by its action (the codes in constants,
+    as for Simulation.step) and plays out the rest of the tick for all games
+    at once, with the same rules as Simulation. Ghosts take their turns one
+    slot at a time across all games, so collisions resolve in the same order.
+
+    Ghost randomness comes from one NumPy generator for all games, unless
+    python_rng is set: then game k draws from random.Random(seed + k) exactly
+    as Simulation(seed=seed + k) does, and the same actions play out the same
+    game in both engines -- at the cost of a Python call per random ghost move.
+    Finished games stay as they ended until reset(). The ghosts' constants
+    come from config, as in Simulation.
+    """
+
+    def __init__(self, num_envs, level=0, seed=None, python_rng=False, config=DEFAULT_CONFIG):
+        self.num_envs = num_envs
+        self.start_level = level
+        self.seed = seed
+        self.python_rng = python_rng
+        self.config = config
+        self.mazes = np.array(MAZES, dtype=np.int8)
+        self.rows, self.cols = self.mazes.shape[1:]
+        # Ghosts chase and flee by walking distance from Pac-Man, as with Simulation.pacman_map
+        self.walks = np.stack([walk_matrix(maze) for maze in MAZES])
+        self._ghost_template = reset_level(level)[3]
+        self.reset()
+
+    def reset(self):
+        """Start every game over from the first level."""
+        count = self.num_envs
+        if self.python_rng:
+            self.rngs = [random.Random(None if self.seed is None else self.seed + k) for k in range(count)]
+        else:
+            self.rng = np.random.default_rng(self.seed)
+        self.level = np.full(count, self.start_level)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.state = np.full(count, PLAYING, dtype=np.int8)
+        self.cause = np.zeros(count, dtype=np.int8)
+        self.ticks = np.zeros(count, dtype=np.int64)
+        self.maze = np.empty((count, self.rows, self.cols), dtype=np.int8)
+        self.pellets = np.zeros(count, dtype=np.int64)
+        self.pacman = np.empty((count, 2), dtype=np.int64)
+        self.direction = np.empty(count, dtype=np.int8)
+        self.power_mode = np.zeros(count, dtype=bool)
+        self.power_timer = np.zeros(count, dtype=np.int64)
+        self.ghosts_eaten = np.zeros(count, dtype=np.int64)
+        self.ghosts = self._ghost_template.stacked(count)
+        self._reset_level(np.arange(count))
+
+    def _reset_level(self, games):
+        self.maze[games] = self.mazes[self.level[games]]
+        self.pellets[games] = np.count_nonzero(self.maze[games] >= 2, axis=(1, 2))
+        self.pacman[games] = (1, 1)
+        self.direction[games] = RIGHT
+        self.power_mode[games] = False
+        self.power_timer[games] = 0
+        self.ghosts_eaten[games] = 0
+        for name in self.ghosts.FIELDS:
+            getattr(self.ghosts, name)[games] = self._ghost_template.array(name)
+
+    @property
+    def done(self):
+        return self.state != PLAYING
+
+    def step(self, actions):
+        """Advance every unfinished game by one tick.
+
+        Returns (rewards, dones): the score each game gained this tick and
+        whether it has ended.
+        """
+        actions = np.asarray(actions)
+        live = self.state == PLAYING
+        score_before = self.score.copy()
+
+        moves, target = self._action_targets(actions)
+        moves &= live
+        games = np.flatnonzero(moves)
+        delta = target[games] - self.pacman[games]
+        self.direction[games] = np.select(
+            [delta[:, 0] < 0, delta[:, 0] > 0, delta[:, 1] < 0, delta[:, 1] > 0],
+            [UP, DOWN, LEFT, RIGHT], self.direction[games])
+        self.pacman[games] = target[games]
+        ran_into = self._collide(moves)
+        self.state[ran_into] = GAME_OVER
+        self.cause[ran_into] = 1
+        playing = live & ~ran_into
+
+        self._eat(playing)
+        cleared = playing & (self.pellets == 0)
+        self.level[cleared] += 1
+        next_level = cleared & (self.level < len(self.mazes))
+        self._reset_level(np.flatnonzero(next_level))
+        won = cleared & ~next_level
+        self.state[won] = WIN
+        # Won games are over, and their level is past the last maze
+        playing &= ~won
+
+        turn = playing.copy()
+        for j in range(self.ghosts.rows.shape[1]):
+            self._ghost_turn(j, turn)
+            # A caught game's remaining ghosts stay put, as in move_all()
+            turn &= self.state == PLAYING
+
+        powered = playing & self.power_mode
+        self.power_timer[powered] -= 1
+        ended = powered & (self.power_timer <= 0)
+        if ended.any():
+            ghosts = self.ghosts
+            self.power_mode[ended] = False
+            self.ghosts_eaten[ended] = 0
+            ghosts.frightened[ended] &= ghosts.respawn_timer[ended] > 0
+            ghosts.was_in_power_mode[ended] = False
+
+        self.ticks[live] += 1
+        return self.score - score_before, self.done
+
+    def _heuristic(self, r, c, tr, tc):
+        """heuristic() for arrays of cells, warp shortcut included."""
+        dist = np.abs(r - tr) + np.abs(c - tc)
+        last = self.cols - 1
+        through = np.minimum(np.abs(c) + np.abs(tc - last), np.abs(c - last) + np.abs(tc)) + 1
+        return np.where((r == WARP_ROW) & (tr == WARP_ROW), np.minimum(dist, through), dist)
+
+    def _is_open(self, games, r, c):
+        inside = (r >= 0) & (r < self.rows) & (c >= 0) & (c < self.cols)
+        cells = self.maze[games, np.clip(r, 0, self.rows - 1), np.clip(c, 0, self.cols - 1)]
+        return inside & (cells != 1)
+
+    def _action_targets(self, actions):
+        """(moves, target): which games' actions move Pac-Man, and where to (see action_target())."""
+        games = np.arange(self.num_envs)
+        pr, pc = self.pacman[:, 0], self.pacman[:, 1]
+        target = self.pacman + _ACTION_DELTAS[actions]
+        grid = np.isin(actions, (UP, DOWN, LEFT, RIGHT)) & self._is_open(games, target[:, 0], target[:, 1])
+        last = self.cols - 1
+        near_row = np.abs(pr - WARP_ROW) <= 2
+        warp_left = (actions == WARP_LEFT) & near_row & ((pc == last) | (self._heuristic(pr, pc, WARP_ROW, last) <= 2))
+        warp_right = (actions == WARP_RIGHT) & near_row & ((pc == 0) | (self._heuristic(pr, pc, WARP_ROW, 0) <= 2))
+        target[warp_left] = (WARP_ROW, 0)
+        target[warp_right] = (WARP_ROW, last)
+        return grid | (actions == STAY) | warp_left | warp_right, target
+
+    def _collide(self, games):
+        """check_collision() for the games in the games mask; returns the games lost."""
+        ghosts = self.ghosts
+        hits = ghosts.active() & (ghosts.rows == self.pacman[:, :1]) & (ghosts.cols == self.pacman[:, 1:])
+        hits &= games[:, None]
+        hit = hits.any(axis=1)
+        eat = np.flatnonzero(hit & self.power_mode)
+        if len(eat):
+            first = hits[eat].argmax(axis=1)
+            ghosts.eaten[eat, first] = True
+            ghosts.respawn_timer[eat, first] = RESPAWN_DELAY
+            ghosts.frightened[eat, first] = False
+            self.score[eat] += 200 * (self.ghosts_eaten[eat] + 1)
+            self.ghosts_eaten[eat] += 1
+        return hit & ~self.power_mode
+
+    def _eat(self, games):
+        idx = np.flatnonzero(games)
+        rows, cols = self.pacman[idx, 0], self.pacman[idx, 1]
+        cell = self.maze[idx, rows, cols]
+        eaten = cell >= 2
+        self.maze[idx[eaten], rows[eaten], cols[eaten]] = 0
+        self.pellets[idx[eaten]] -= 1
+        self.score[idx] += np.where(cell == 2, 10, np.where(cell == 3, 50, 0))
+        power = idx[cell == 3]
+        self.power_mode[power] = True
+        self.power_timer[power] = 60
+        self.ghosts.frightened[power] |= self.ghosts.active()[power]
+
+    def _ghost_turn(self, j, games):
+        """Ghost slot j's part of move_all() in every game of the games mask."""
+        ghosts = self.ghosts
+        respawning = games & (ghosts.respawn_timer[:, j] > 0)
+        ghosts.respawn_timer[respawning, j] -= 1
+        back = respawning & (ghosts.respawn_timer[:, j] == 0)
+        ghosts.eaten[back, j] = False
+        ghosts.rows[back, j], ghosts.cols[back, j] = GHOST_SPAWN
+        ghosts.frightened[back, j] = self.power_mode[back]
+        moving = games & ~respawning
+        self._move_ghosts(j, moving)
+        caught = self._collide(moving)
+        self.cause[caught & (self.cause == 0)] = 2
+        self.state[caught] = GAME_OVER
+
+    def _move_ghosts(self, j, games):
+        """move_ghost() for ghost slot j in every game of the games mask."""
+        ghosts = self.ghosts
+        waiting = games & (ghosts.eaten[:, j] | (ghosts.respawn_timer[:, j] > 0) | (ghosts.start_delay[:, j] > 0))
+        ghosts.start_delay[waiting, j] = np.maximum(0, ghosts.start_delay[waiting, j] - 1)
+        games = games & ~waiting
+        warping = games & (ghosts.warp_delay[:, j] > 0)
+        ghosts.warp_delay[warping, j] -= 1
+        games &= ~warping
+        ghosts.move_timer[games, j] += 1
+        slowed = ghosts.slowdown_timer[:, j] > 0
+        idx = np.flatnonzero(games & (ghosts.move_timer[:, j] >= np.where(slowed, self.config.ghost_slow_move_ticks, self.config.ghost_move_ticks)))
+        if not len(idx):
+            return
+        ghosts.move_timer[idx, j] = 0
+        ghosts.slowdown_timer[idx[slowed[idx]], j] -= 1
+        move = self._ghost_moves(j, idx)
+        r = ghosts.rows[idx, j] + move[:, 0]
+        c = ghosts.cols[idx, j] + move[:, 1]
+        wrap_left = (r == WARP_ROW) & (c < 0)
+        wrap_right = (r == WARP_ROW) & (c >= self.cols)
+        c[wrap_left] = self.cols - 1
+        c[wrap_right] = 0
+        wrapped = idx[wrap_left | wrap_right]
+        ghosts.warp_delay[wrapped, j] = 22.5
+        ghosts.slowdown_timer[wrapped, j] = 45
+        ok = self._is_open(idx, r, c)
+        moved = idx[ok]
+        ghosts.rows[moved, j] = r[ok]
+        ghosts.cols[moved, j] = c[ok]
+        ghosts.last_move[moved, j] = move[ok]
+
+    def _ghost_moves(self, j, idx):
+        """The (row, col) step ghost slot j picks in each of the games idx."""
+        ghosts = self.ghosts
+        r, c = ghosts.rows[idx, j], ghosts.cols[idx, j]
+        pr, pc = self.pacman[idx, 0], self.pacman[idx, 1]
+        power = self.power_mode[idx]
+        starts_fleeing = power & ~ghosts.was_in_power_mode[idx, j]
+        fleeing = power & ~starts_fleeing
+        ghosts.was_in_power_mode[idx, j] = power
+        last_move = ghosts.last_move[idx, j]
+        reverse = starts_fleeing & last_move.any(axis=1)
+        # ghost_step() in each direction, and its walking distance from Pac-Man
+        nr = r[:, None] + _DIRECTIONS[:, 0]
+        nc = c[:, None] + _DIRECTIONS[:, 1]
+        nc = np.where(nr == WARP_ROW, nc % self.cols, nc)
+        is_open = self._is_open(idx[:, None], nr, nc)
+        level, source = self.level[idx], pr * self.cols + pc
+        cells = np.clip(nr, 0, self.rows - 1) * self.cols + np.clip(nc, 0, self.cols - 1)
+        dist = np.where(is_open, self.walks[level[:, None], source[:, None], cells], np.inf)
+        # A fleeing ghost picks among the open directions away from Pac-Man,
+        # plus each other open direction that passes a 20% roll.
+        away = dist > self.walks[level, source, r * self.cols + c][:, None]
+        if self.python_rng:
+            picks = self._python_picks(idx, ~power, starts_fleeing & ~reverse, fleeing, is_open & away, is_open & ~away)
+        else:
+            picks = self._numpy_picks(~power, starts_fleeing & ~reverse, fleeing, is_open & away, is_open & ~away)
+        # Chasing ghosts take the first step of a shortest path to Pac-Man, or
+        # when he cannot be reached, step along the axis with the larger gap
+        row_diff, col_diff = pr - r, pc - c
+        vertical = np.abs(row_diff) > np.abs(col_diff)
+        greedy = np.where(vertical[:, None],
+                          np.stack([np.where(row_diff > 0, 1, -1), np.zeros_like(r)], axis=1),
+                          np.stack([np.zeros_like(c), np.where(col_diff > 0, 1, -1)], axis=1))
+        chase = np.where(np.isfinite(dist.min(axis=1))[:, None], _DIRECTIONS[dist.argmin(axis=1)], greedy)
+        move = np.where((picks >= 0)[:, None], _DIRECTIONS[picks], chase)
+        return np.where(reverse[:, None], -last_move, move)
+
+    def _python_picks(self, idx, chasing, random_start, fleeing, valid, roll):
+        """Random direction picks (-1 for none) drawn as move_ghost() draws them."""
+        picks = np.full(len(idx), -1)
+        chasing, random_start, fleeing = chasing.tolist(), random_start.tolist(), fleeing.tolist()
+        valid, roll = valid.tolist(), roll.tolist()
+        random_rate = self.config.ghost_random_rate
+        for n, k in enumerate(idx.tolist()):
+            rng = self.rngs[k]
+            if chasing[n]:
+                if rng.random() < random_rate:
+                    picks[n] = rng.choice(_ANY_DIRECTION)
+            elif random_start[n]:
+                picks[n] = rng.choice(_ANY_DIRECTION)
+            elif fleeing[n]:
+                options = [d for d in _ANY_DIRECTION if valid[n][d] or (roll[n][d] and rng.random() < 0.2)]
+                picks[n] = rng.choice(options or _ANY_DIRECTION)
+        return picks
+
+    def _numpy_picks(self, chasing, random_start, fleeing, valid, roll):
+        count = len(chasing)
+        rng = self.rng
+        picks = np.where((chasing & (rng.random(count) < self.config.ghost_random_rate)) | random_start, rng.integers(0, 4, count), -1)
+        options = valid | (roll & (rng.random((count, 4)) < 0.2))
+        option_count = options.sum(axis=1)
+        which = (rng.random(count) * np.where(option_count > 0, option_count, 4)).astype(int)
+        chosen = np.where(option_count > 0, (np.cumsum(options, axis=1) > which[:, None]).argmax(axis=1), which)
+        return np.where(fleeing, chosen, picks)
+
+    def results(self):
+        """episode_result()-style dicts, one per game."""
+        return [
+            {
+                "seed": None if self.seed is None or not self.python_rng else self.seed + k,
+                "state": STATES[self.state[k]],
+                "score": int(self.score[k]),
+                "level": int(min(self.level[k], len(self.mazes) - 1)) + 1,
+                "ticks": int(self.ticks[k]),
+                "cause": CAUSES[self.cause[k]] if self.state[k] != PLAYING else "timeout",
+            }
+            for k in range(self.num_envs)
+        ]